@@ -1,16 +1,21 @@
 
-from cpu_memory_process import get_total_cpu_usage, get_top_cpu_process, get_total_memory_usage, get_top_memory_process,get_top_cpu_consuming,get_top_memory_consuming,get_top_cpu_consuming_process,get_top_memory_consuming_process
+from cpu_memory_process import get_total_cpu_usage, get_top_cpu_process, get_total_memory_usage, get_top_memory_process,get_top_cpu_consuming,get_top_memory_consuming,get_top_cpu_consuming_process,get_top_memory_consuming_process,get_windows_usage_and_top_process,get_linux_cpu_usage_and_top_process,get_linux_metrics_snapshot,get_top_process_samples
+from process_sample_helper import format_process_samples
+from metrics_sampler_helper import get_fresh_metric,get_fresh_top_process
 
-def get_actual_threshold(device_config):
+def get_actual_threshold(device_config, snapshot=None):
     """
     for-CPUMemoryResourceRemediation Determines and retrieves the total usage of cpu/memory  for a given device based on its configuration.
     The function takes in the `device_config` dictionary containing device settings such as alert type, 
     OS type, and device name.If the threshold is successfully retrieved, it is processed and returned 
-    as a cleaned string else this function update incident with an escalation status.
+    as a cleaned string else this function update incident with an escalation status. When the background
+    metrics sampler holds a fresh sample for the device, that value is returned without a live probe.
     Args:device_config (dict): A dictionary containing the following keys:
             - "alert_type" (str): The type of alert, either 'CPU' or 'MEMORY'.
             - "is_linux" (bool): Specifies if the device is a Linux machine.
             - "device_name" (str): The name or identifier of the device.
+        snapshot (dict, optional): A get_linux_metrics_snapshot result already taken for the device; pass the
+            same snapshot to get_top_utilization_process so the alert costs one SSH round trip.
     Returns:str or None: Returns the numerical value of actual threshold as string or None if an error occurs or the threshold is unavailable.
     """
     try:
@@ -20,16 +25,27 @@ def get_actual_threshold(device_config):
             is_linux = device_config['isLinux']
             device_name = device_config["hostName"]
             retry_count=3
-            if alert_type == 'CPU':
-                if is_linux:
-                    actual_threshold = get_top_cpu_consuming(device_name,retry_count)
-                else:
-                    actual_threshold = get_total_cpu_usage(device_name,retry_count)
-            elif alert_type == 'MEMORY':
-                if is_linux:
-                    actual_threshold = get_top_memory_consuming(device_name,retry_count)
-                else:
-                    actual_threshold = get_total_memory_usage(device_name,retry_count)
+            actual_threshold = get_fresh_metric(device_name, alert_type) if snapshot is None else None
+            if actual_threshold is not None:
+                print(f"Using sampled {alert_type} usage for {device_name}")
+            else:
+                # Linux hosts are measured with one /proc snapshot; top/free remain the fallback
+                if snapshot is None and is_linux and alert_type in ('CPU', 'MEMORY'):
+                    snapshot = get_linux_metrics_snapshot(device_name)
+                if alert_type == 'CPU':
+                    if snapshot is not None:
+                        actual_threshold = str(snapshot["cpu_usage"])
+                    elif is_linux:
+                        actual_threshold = get_top_cpu_consuming(device_name,retry_count)
+                    else:
+                        actual_threshold = get_total_cpu_usage(device_name,retry_count)
+                elif alert_type == 'MEMORY':
+                    if snapshot is not None:
+                        actual_threshold = str(snapshot["memory_usage"])
+                    elif is_linux:
+                        actual_threshold = get_top_memory_consuming(device_name,retry_count)
+                    else:
+                        actual_threshold = get_total_memory_usage(device_name,retry_count)
             if actual_threshold is not None:
                 actual_threshold = actual_threshold.encode().decode().strip()
                 device_config['total_usage']=actual_threshold
@@ -43,29 +59,135 @@ def get_actual_threshold(device_config):
         print(exception)
 
 
-def get_top_utilization_process(device_config):
+def get_top_utilization_process(device_config, snapshot=None):
     """
     If users want the top utilization process this function retrives the top five resource consuming processes (e.g top cpu or memory consuming) for the device
     based on whether it's Linux or not.
     Arguments:
     - device_config (dict): A dictionary containing device configuration details, such as device name, 
     alert type, and is_linux(flag for linux based devices)
-    Return: Top resource consuming process on the device
+    - snapshot (dict, optional): The get_linux_metrics_snapshot result passed to get_actual_threshold for the same
+    alert, so the processes come from that snapshot instead of a second SSH round trip.
+    Return: Top resource consuming process on the device, or None without contacting the device when the sampled
+    history shows a transient or recovered breach (see is_remediation_required).
     """
+    if not is_remediation_required(device_config):
+        print(f'Skipping the process lookup for {device_config['hostName']}, the breach is {device_config['breach_verdict']}')
+        return None
     print(f'Getting the top resource consuming process for {device_config['hostName']}')
     top_process=None
-    if device_config["alertType"] == 'CPU':
-        if device_config['isLinux']:
-            print("linux case")
-            top_process = get_top_cpu_consuming_process(device_config['hostName'])
+    if snapshot is None and device_config['isLinux'] and device_config["alertType"] in ('CPU', 'MEMORY'):
+        snapshot = get_linux_metrics_snapshot(device_config['hostName'])
+    if device_config["alertType"] in ('CPU', 'MEMORY'):
+        if snapshot is not None:
+            samples = snapshot["top_cpu_process"] if device_config["alertType"] == 'CPU' else snapshot["top_memory_process"]
         else:
-            top_process = get_top_cpu_process(device_config["hostName"])
-    elif device_config["alertType"] == 'MEMORY':
-        if device_config['isLinux']:
-            print('linux case')
-            top_process = get_top_memory_consuming_process(device_config['hostName'])
-        else:
-            top_process = get_top_memory_process(device_config["hostName"])
+            samples = get_top_process_samples(device_config['hostName'], device_config["alertType"], device_config['isLinux'])
+        top_process = format_process_samples(samples, device_config["alertType"], device_config['isLinux'])
     else:
         print("Alert type is unknown")
     return top_process
+
+
+def get_threshold_and_top_process(device_config):
+    """
+    Combines get_actual_threshold and get_top_utilization_process. For Windows devices both probes are sent
+    in a single WinRM round trip, Linux devices are measured with a single /proc snapshot. If the snapshot
+    fails, Linux CPU alerts sample the CPU and list the processes concurrently on one SSH connection and
+    Linux memory alerts fall back to free and ps. When the background metrics sampler holds a fresh usage
+    and process list for the device, both are answered without contacting it. When the sampled history shows
+    a transient or recovered breach, only the threshold is returned and no process list is fetched.
+    Arguments:
+    - device_config (dict): A dictionary containing device configuration details, such as hostName,
+    alertType, and isLinux(flag for linux based devices)
+    Return: tuple: (actual threshold as string or None, top resource consuming process or None)
+    """
+    actual_threshold, top_process = None, None
+    try:
+        if device_config:
+            snapshot = None
+            sampled_threshold = get_fresh_metric(device_config["hostName"], device_config["alertType"])
+            sampled_process = get_fresh_top_process(device_config["hostName"], device_config["alertType"])
+            # the sampled pair is only used when both halves are fresh, otherwise the device is probed
+            is_sampled = sampled_threshold is not None and sampled_process is not None
+            if not is_sampled and device_config['isLinux'] and device_config["alertType"] in ('CPU', 'MEMORY'):
+                snapshot = get_linux_metrics_snapshot(device_config["hostName"])
+            if device_config["alertType"] not in ('CPU', 'MEMORY'):
+                actual_threshold = get_actual_threshold(device_config)
+                top_process = get_top_utilization_process(device_config)
+            elif not is_remediation_required(device_config):
+                print(f'Skipping the process lookup for {device_config["hostName"]}, the breach is {device_config["breach_verdict"]}')
+                actual_threshold = get_actual_threshold(device_config)
+            else:
+                if is_sampled:
+                    print(f'Using sampled {device_config["alertType"]} usage for {device_config["hostName"]}')
+                    actual_threshold, top_process = sampled_threshold, sampled_process
+                elif snapshot is not None and device_config["alertType"] == 'CPU':
+                    actual_threshold, top_process = str(snapshot["cpu_usage"]), snapshot["top_cpu_process"]
+                elif snapshot is not None:
+                    actual_threshold, top_process = str(snapshot["memory_usage"]), snapshot["top_memory_process"]
+                elif device_config['isLinux'] and device_config["alertType"] == 'CPU':
+                    actual_threshold, top_process = get_linux_cpu_usage_and_top_process(device_config["hostName"])
+                elif device_config['isLinux']:
+                    actual_threshold = get_top_memory_consuming(device_config["hostName"], 3)
+                    top_process = get_top_process_samples(device_config["hostName"], 'MEMORY', True)
+                else:
+                    actual_threshold, top_process = get_windows_usage_and_top_process(device_config["hostName"], device_config["alertType"])
+                # the collectors return ProcessSample entries; they are formatted for the incident here
+                top_process = format_process_samples(top_process, device_config["alertType"], device_config['isLinux'])
+                if actual_threshold is not None:
+                    actual_threshold = actual_threshold.encode().decode().strip()
+                    device_config['total_usage'] = actual_threshold
+                    print(f'The actual thresold for the {device_config["alertType"]} on {device_config["hostName"]} is {actual_threshold}')
+                else:
+                    print("Threshold empty")
+        else:
+            print("Device Config is None")
+    except Exception as exception:
+        print(exception)
+    return actual_threshold, top_process
+
+
+def get_breach_analysis(device_config, window=900):
+    """
+    Classifies the alert of a device as a sustained breach, a transient spike or already recovered, using the
+    history the background metrics sampler holds for it (see breach_analysis_helper.analyze_hosts).
+    Arguments:
+    - device_config (dict): A dictionary containing device configuration details, such as hostName,
+    alertType and thresholdValue
+    - window (float): How many seconds of history to analyze.
+    Return: dict: The analysis with its "verdict" ('sustained', 'transient' or 'recovered'), or None when the
+    device is not sampled, has too little history or no usable thresholdValue.
+    """
+    import time
+    from metrics_sampler_helper import metrics_sampler
+    analysis = None
+    try:
+        if device_config and device_config.get("alertType") in ('CPU', 'MEMORY'):
+            samples = metrics_sampler.get_samples(device_config["hostName"], since=time.time() - window)
+            if samples is not None and len(samples[0]) > 0:
+                from breach_analysis_helper import analyze_samples
+                timestamps, cpu, memory = samples
+                values = cpu if device_config["alertType"] == 'CPU' else memory
+                analysis = analyze_samples(timestamps, values, device_config.get("thresholdValue"))
+                if analysis["verdict"] is None:
+                    analysis = None
+                else:
+                    print(f'{device_config["alertType"]} breach on {device_config["hostName"]} is {analysis["verdict"]}')
+    except Exception as exception:
+        print(exception)
+    return analysis
+
+
+def is_remediation_required(device_config):
+    """
+    Returns False when the sampled history shows the alert was a transient spike or has already recovered,
+    so the remediation (and its remote calls) can be skipped; the verdict is kept in device_config['breach_verdict'].
+    get_top_utilization_process and get_threshold_and_top_process do not fetch a process list in that case.
+    Without enough history it returns True and the bot proceeds as before.
+    """
+    analysis = get_breach_analysis(device_config)
+    if analysis is None:
+        return True
+    device_config['breach_verdict'] = analysis["verdict"]
+    return analysis["verdict"] == 'sustained'
@@ -0,0 +1,197 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+ASYNC_REMOTE_MAX_CONCURRENCY = int(os.getenv('ASYNC_REMOTE_MAX_CONCURRENCY', 100))
+ASYNC_REMOTE_MAX_PER_HOST = int(os.getenv('ASYNC_REMOTE_MAX_PER_HOST', 4))
+
+
+class RemoteExecutionEngine:
+    """
+    Runs blocking WinRM/SSH calls on a dedicated event loop with a global and a per-host concurrency limit.
+    pywinrm and paramiko are blocking libraries, so every remote call is executed on a worker thread while the
+    engine's event loop only admits calls through the limits. The loop lives in its own daemon thread, so the
+    limits are shared by every caller in the process: coroutines on any other event loop and plain
+    synchronous code (Airflow tasks, the existing bots) alike. The caller's context, and with it a
+    deadline_context budget, is carried over to the worker thread; a call whose deadline passes while it is
+    still queued is not started.
+    """
+
+    def __init__(self, max_concurrency=ASYNC_REMOTE_MAX_CONCURRENCY, max_per_host=ASYNC_REMOTE_MAX_PER_HOST):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_per_host = max(1, int(max_per_host))
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._global_limit = None
+        self._host_limits = {}
+        self._local = threading.local()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the engine loop thread if it is not running yet.
+        Returns:asyncio.AbstractEventLoop: The engine's event loop.
+        """
+        with self._start_lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix='remote-exec',
+                                                    initializer=self._mark_worker)
+                self._global_limit = None
+                self._host_limits = {}
+                self._thread = threading.Thread(target=self._loop.run_forever, name='remote-exec-loop', daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def shutdown(self):
+        """
+        Stops the engine loop and its worker threads. The engine starts again on the next call.
+        """
+        with self._start_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._executor.shutdown(wait=False)
+                self._loop.close()
+                self._loop = None
+
+    def in_worker(self):
+        """
+        Returns True when called from one of the engine's own threads.
+        """
+        return getattr(self._local, 'is_worker', False) or threading.current_thread() is self._thread
+
+    async def run(self, host_name, func, *args):
+        """
+        Runs func(*args) for the given host inside the concurrency limits and returns its result.
+        Can be awaited from any event loop.
+        Args:
+            host_name (str): The host the call targets, used for the per-host limit.
+            func (callable): The blocking function to execute.
+            *args: Positional arguments passed to func.
+        Returns:The return value of func.
+        """
+        loop = self.start()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        context = contextvars.copy_context()
+        if running_loop is loop:
+            return await self._run_limited(context, host_name, func, *args)
+        future = asyncio.run_coroutine_threadsafe(self._run_limited(context, host_name, func, *args), loop)
+        return await asyncio.wrap_future(future)
+
+    def run_sync(self, host_name, func, *args):
+        """
+        Blocking counterpart of run for synchronous callers.
+        When called from an engine worker thread the function is executed directly, since waiting on the
+        engine from inside it could exhaust the limits it is holding. Inside a deadline_context the caller
+        waits at most for the remaining budget. If the call is still running by then, the deadline is aborted,
+        which closes the pooled session or channel the call is blocked on so it is not reused, and
+        DeadlineExceeded is raised.
+        Raises:deadline_helper.DeadlineExceeded: When the deadline runs out before the call finishes.
+        """
+        from deadline_helper import get_current_deadline, DeadlineExceeded
+        if self.in_worker():
+            return func(*args)
+        future = self.submit(host_name, func, *args)
+        deadline = get_current_deadline()
+        try:
+            return future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except FutureTimeoutError:
+            # cancel() only helps while the call is queued; a running call is stopped through the deadline
+            future.cancel()
+            deadline.abort()
+            raise DeadlineExceeded(f"Remote call to {host_name} did not finish within its deadline")
+
+    def submit(self, host_name, func, *args):
+        """
+        Schedules func(*args) for the given host inside the concurrency limits without waiting for it.
+        Returns:
+            concurrent.futures.Future: A future for the result; cancelling it before the call has been
+            admitted removes it from the queue.
+        """
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(self._run_limited(contextvars.copy_context(), host_name, func, *args), loop)
+
+    async def _run_limited(self, context, host_name, func, *args):
+        from deadline_helper import is_deadline_expired
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limit = self._host_limits.get(host_name)
+        if host_limit is None:
+            host_limit = self._host_limits[host_name] = [asyncio.Semaphore(self.max_per_host), 0]
+        host_limit[1] += 1
+        try:
+            async with host_limit[0]:
+                async with self._global_limit:
+                    if context.run(is_deadline_expired):
+                        print(f"Deadline passed before the call to {host_name} was started")
+                        return None
+                    return await self._loop.run_in_executor(self._executor, context.run, func, *args)
+        finally:
+            host_limit[1] -= 1
+            if host_limit[1] == 0:
+                self._host_limits.pop(host_name, None)
+
+    def _mark_worker(self):
+        self._local.is_worker = True
+
+
+remote_execution_engine = RemoteExecutionEngine()
+
+
+async def async_get_winrm_script_result(host_name, command_text, is_ntlm=True):
+    """
+    Async counterpart of get_winrm_script_result.
+    Args:
+        host_name (str): The IP address or host name of the remote Windows machine.
+        command_text (str): The PowerShell command to execute on the remote machine.
+        is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+    Returns:
+        str: The command's output if successfull, else None if an error occurs.
+    """
+    from remote_connection_helper import execute_winrm_script
+    return await remote_execution_engine.run(host_name, execute_winrm_script, host_name, command_text, is_ntlm)
+
+
+async def async_get_ssh_script_result(host_name, command_text, sudo_access=True, db_connection=None):
+    """
+    Async counterpart of get_ssh_script_result.
+    Args:
+        host_name (str): The IP address or host name of the remote Linux machine.
+        command_text (str): The command or script to execute.
+        sudo_access (bool): Whether to execute the command with sudo privileges (default: True).
+        db_connection (dict): Optional dictionary for authentication credentials.
+    Returns:
+        list: The output lines of the executed command, or None if an error occurs.
+    """
+    from remote_connection_helper import execute_ssh_script
+    return await remote_execution_engine.run(host_name, execute_ssh_script, host_name, command_text, sudo_access, db_connection)
+
+
+async def async_get_winrm_connection_status(host_name, is_ntlm=True):
+    """
+    Async counterpart of get_winrm_connection_status.
+    Returns:str: "Success" if the host is reachable via WinRM, otherwise "Failure".
+    """
+    result = await async_get_winrm_script_result(host_name, 'Test-WSMan', is_ntlm)
+    return "Success" if result is not None else "Failure"
+
+
+async def async_get_ssh_reachable_status(host_name, db_connection=None):
+    """
+    Async counterpart of get_ssh_reachable_status.
+    Returns:str: "Success" if the 'pwd' probe ran over SSH, otherwise "Failure".
+    """
+    from remote_connection_helper import get_ssh_reachable_status
+    return await remote_execution_engine.run(host_name, get_ssh_reachable_status, host_name, db_connection)
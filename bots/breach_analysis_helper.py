@@ -0,0 +1,128 @@
+import os
+import warnings
+import numpy as np
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+BREACH_EWMA_ALPHA = float(os.getenv('BREACH_EWMA_ALPHA', 0.3))
+BREACH_MIN_SAMPLES = int(os.getenv('BREACH_MIN_SAMPLES', 3))
+# a breach is sustained once the value has stayed above the threshold for this many seconds in a row ...
+BREACH_MIN_DURATION = float(os.getenv('BREACH_MIN_DURATION', 300))
+# ... or for this share of the observed window while the EWMA is still above the threshold
+BREACH_SUSTAINED_RATIO = float(os.getenv('BREACH_SUSTAINED_RATIO', 0.6))
+SUSTAINED = 'sustained'
+TRANSIENT = 'transient'
+RECOVERED = 'recovered'
+
+
+def parse_threshold(threshold_value):
+    """
+    Converts an incident thresholdValue such as 90, "90" or "90 %" into a float.
+    Returns:float or None: The threshold, or None if it cannot be parsed.
+    """
+    try:
+        return float(str(threshold_value).replace('%', '').strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_sample_matrix(series):
+    """
+    Stacks per-host sample series of different lengths into two NaN padded matrices.
+    Args:series (list): (timestamps, values) pairs, each oldest first.
+    Returns:tuple: (timestamps, values) arrays of shape (hosts, longest series).
+    """
+    length = max([len(values) for timestamps, values in series] + [1])
+    timestamp_matrix = np.full((len(series), length), np.nan)
+    value_matrix = np.full((len(series), length), np.nan)
+    for row, (timestamps, values) in enumerate(series):
+        timestamp_matrix[row, :len(timestamps)] = np.asarray(timestamps, dtype=float)
+        value_matrix[row, :len(values)] = np.asarray(values, dtype=float)
+    return timestamp_matrix, value_matrix
+
+
+def analyze_hosts(samples, thresholds, alpha=BREACH_EWMA_ALPHA, min_samples=BREACH_MIN_SAMPLES,
+                  min_duration=BREACH_MIN_DURATION, sustained_ratio=BREACH_SUSTAINED_RATIO):
+    """
+    Analyzes the metric history of many hosts at once.
+    Each sample is taken to last until the next one (the last sample for the host's median sampling
+    interval), which gives the time spent above the threshold over the window and in the current, still
+    ongoing breach. The verdict per host is:
+        - "recovered": the latest value and the EWMA are at or below the threshold.
+        - "sustained": the current breach has lasted `min_duration` seconds, or the value was above the threshold
+          for at least `sustained_ratio` of the window and the EWMA is still above it.
+        - "transient": anything else, i.e. a short spike.
+    Hosts with fewer than `min_samples` samples, or without a usable threshold, get the verdict None.
+    Args:
+        samples (dict): {host_name: (timestamps, values)} with timestamps in seconds, oldest first.
+        thresholds (dict or float): {host_name: threshold} or one threshold for every host.
+        alpha (float): The EWMA smoothing factor (weight of the newest sample).
+    Returns:
+        dict: {host_name: {"verdict", "samples", "mean", "p50", "p90", "p95", "max", "ewma", "latest",
+        "time_above", "ratio_above", "breach_duration", "threshold"}}.
+    """
+    host_names = list(samples)
+    if not host_names:
+        return {}
+    timestamps, values = get_sample_matrix([samples[host_name] for host_name in host_names])
+    if isinstance(thresholds, dict):
+        threshold = np.array([parse_threshold(thresholds.get(host_name)) for host_name in host_names], dtype=float)
+    else:
+        threshold = np.full(len(host_names), parse_threshold(thresholds), dtype=float)
+    rows = np.arange(len(host_names))
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    with warnings.catch_warnings():
+        # hosts without samples are all-NaN rows
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(values, axis=1)
+        p50, p90, p95 = np.nanpercentile(values, [50, 90, 95], axis=1)
+        maximum = np.nanmax(values, axis=1)
+        intervals = np.diff(timestamps, axis=1, append=np.nan)
+        median_interval = np.nan_to_num(np.nanmedian(intervals, axis=1))
+    latest = values[rows, np.maximum(count - 1, 0)]
+    durations = np.where(valid & np.isnan(intervals), median_interval[:, None], intervals)
+    durations = np.where(valid, np.nan_to_num(durations), 0.0)
+    ewma = np.full(len(host_names), np.nan)
+    for column in range(values.shape[1]):
+        column_values = values[:, column]
+        smoothed = np.where(np.isnan(ewma), column_values, alpha * column_values + (1 - alpha) * ewma)
+        ewma = np.where(np.isnan(column_values), ewma, smoothed)
+    above = valid & (values > threshold[:, None])
+    time_above = np.where(above, durations, 0.0).sum(axis=1)
+    observed = durations.sum(axis=1)
+    ratio_above = np.divide(time_above, observed, out=np.zeros_like(time_above), where=observed > 0)
+    positions = np.arange(values.shape[1])
+    last_below = np.where(valid & ~above, positions, -1).max(axis=1)
+    breach_duration = np.where(above & (positions > last_below[:, None]), durations, 0.0).sum(axis=1)
+    recovered = (latest <= threshold) & (ewma <= threshold)
+    sustained = (breach_duration >= min_duration) | ((ratio_above >= sustained_ratio) & (ewma > threshold))
+    analysis = {}
+    for row, host_name in enumerate(host_names):
+        if count[row] < max(1, min_samples) or np.isnan(threshold[row]):
+            verdict = None
+        elif recovered[row]:
+            verdict = RECOVERED
+        elif sustained[row]:
+            verdict = SUSTAINED
+        else:
+            verdict = TRANSIENT
+        analysis[host_name] = {
+            "verdict": verdict,
+            "samples": int(count[row]),
+            "threshold": None if np.isnan(threshold[row]) else float(threshold[row]),
+            "mean": float(mean[row]), "p50": float(p50[row]), "p90": float(p90[row]), "p95": float(p95[row]),
+            "max": float(maximum[row]), "ewma": float(ewma[row]), "latest": float(latest[row]),
+            "time_above": float(time_above[row]), "ratio_above": float(ratio_above[row]),
+            "breach_duration": float(breach_duration[row])
+        }
+    return analysis
+
+
+def analyze_samples(timestamps, values, threshold, **kwargs):
+    """
+    Analyzes the metric history of one host; see analyze_hosts for the keyword arguments and the result.
+    """
+    return analyze_hosts({None: (timestamps, values)}, threshold, **kwargs)[None]
@@ -0,0 +1,216 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+CIRCUIT_WINDOW_SIZE = int(os.getenv('CIRCUIT_WINDOW_SIZE', 10))
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 3))
+CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 60))
+CIRCUIT_MAX_OPEN_SECONDS = float(os.getenv('CIRCUIT_MAX_OPEN_SECONDS', 900))
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', 3))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 1))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', 15))
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class HostCircuitBreaker:
+    """
+    Circuit breaker for one host.
+    The outcomes of the last `window_size` connection attempts are kept. Once at least `min_calls` of them
+    are known and the failure rate reaches `failure_rate`, the circuit opens and calls are refused without
+    touching the network. After `open_seconds` the circuit is half-open and lets a single trial call through:
+    a success closes it again, a failure reopens it with the open period doubled (up to `max_open_seconds`).
+    """
+
+    def __init__(self, window_size=CIRCUIT_WINDOW_SIZE, min_calls=CIRCUIT_MIN_CALLS, failure_rate=CIRCUIT_FAILURE_RATE,
+                 open_seconds=CIRCUIT_OPEN_SECONDS, max_open_seconds=CIRCUIT_MAX_OPEN_SECONDS):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self.open_seconds = open_seconds
+        self.opened_at = None
+        self.trial_started_at = None
+        self.outcomes = deque(maxlen=window_size)
+
+    def allow_request(self, now):
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self.trial_started_at = None
+        # a trial whose outcome was never reported does not block the host forever
+        if self.trial_started_at is not None and now - self.trial_started_at < self.open_seconds:
+            return False
+        self.trial_started_at = now
+        return True
+
+    def record(self, success, now):
+        if self.state == HALF_OPEN:
+            if success:
+                self.state = CLOSED
+                self.open_seconds = self.base_open_seconds
+                self.outcomes.clear()
+            else:
+                self._open(now, min(self.open_seconds * 2, self.max_open_seconds))
+            self.trial_started_at = None
+            return
+        self.outcomes.append(bool(success))
+        if self.state == CLOSED and len(self.outcomes) >= self.min_calls and self.get_failure_rate() >= self.failure_rate:
+            self._open(now, self.base_open_seconds)
+
+    def get_failure_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def get_retry_after(self, now):
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (now - self.opened_at))
+
+    def _open(self, now, open_seconds):
+        self.state = OPEN
+        self.opened_at = now
+        self.open_seconds = open_seconds
+
+
+class CircuitBreakerRegistry:
+    """
+    Keeps a HostCircuitBreaker per host. Only connection level outcomes (connect, authentication and
+    transport errors) are recorded here; a command that runs and fails on the host does not count.
+    """
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def allow_request(self, host_name):
+        """
+        Returns False while the host's circuit is open; in the half-open state only one trial call is let through.
+        """
+        with self._lock:
+            breaker = self._breakers.get(str(host_name).lower())
+            return breaker is None or breaker.allow_request(time.monotonic())
+
+    def is_open(self, host_name):
+        """
+        Returns True while the host's circuit is open and calls to it are refused. Unlike allow_request this
+        does not use up the half-open trial call.
+        """
+        with self._lock:
+            breaker = self._breakers.get(str(host_name).lower())
+            return breaker is not None and breaker.get_retry_after(time.monotonic()) > 0
+
+    def record(self, host_name, success):
+        """
+        Records the outcome of a connection attempt to the host.
+        """
+        if not host_name:
+            return
+        key = str(host_name).lower()
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                if success:
+                    return
+                breaker = self._breakers[key] = HostCircuitBreaker()
+            breaker.record(success, time.monotonic())
+            if breaker.state == CLOSED and not breaker.outcomes:
+                del self._breakers[key]
+
+    def get_state(self, host_name):
+        """
+        Returns:dict: {"state": "closed"/"open"/"half-open", "failure_rate": float, "calls": int, "retry_after": seconds until a trial call is allowed}.
+        """
+        with self._lock:
+            breaker = self._breakers.get(str(host_name).lower())
+            if breaker is None:
+                return {"state": CLOSED, "failure_rate": 0.0, "calls": 0, "retry_after": 0.0}
+            now = time.monotonic()
+            if breaker.state == OPEN and breaker.get_retry_after(now) == 0:
+                state = HALF_OPEN
+            else:
+                state = breaker.state
+            return {"state": state, "failure_rate": breaker.get_failure_rate(), "calls": len(breaker.outcomes),
+                    "retry_after": breaker.get_retry_after(now)}
+
+    def get_open_hosts(self):
+        """
+        Returns the hosts whose circuit is currently open.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [host_name for host_name, breaker in self._breakers.items() if breaker.get_retry_after(now) > 0]
+
+    def reset(self, host_name=None):
+        """
+        Closes the circuit of a host (or of every host), e.g. after the host was repaired or rebooted.
+        """
+        with self._lock:
+            if host_name is None:
+                self._breakers = {}
+            else:
+                self._breakers.pop(str(host_name).lower(), None)
+
+
+host_circuit_breakers = CircuitBreakerRegistry()
+
+
+def get_backoff_delay(attempt, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """
+    Exponential backoff with full jitter: a random delay between 0 and min(max_delay, base_delay * 2 ** attempt).
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retry(host_name, function, *args, max_attempts=RETRY_MAX_ATTEMPTS, is_failure=None,
+                    base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, **kwargs):
+    """
+    Calls function(*args, **kwargs) until it succeeds, at most `max_attempts` times, sleeping with exponential
+    backoff and jitter between attempts. No attempt is made while the host's circuit is open, so retries
+    stop as soon as the host has been found to be down. Inside a deadline_context no retry is started once
+    the backoff delay would not leave any of the budget for it.
+    Args:
+        host_name (str): The host the call talks to.
+        function (callable): The call to make.
+        max_attempts (int): The maximum number of attempts.
+        is_failure (callable): Optional predicate on the result; by default a None result or an exception is a failure.
+    Returns:
+        The result of the first successful attempt, otherwise the result of the last attempt (None if it raised
+        or if the circuit was open).
+    """
+    from deadline_helper import get_current_deadline, mark_timeout
+    result = None
+    deadline = get_current_deadline()
+    for attempt in range(max(1, int(max_attempts))):
+        if host_circuit_breakers.is_open(host_name):
+            print(f"Circuit for {host_name} is open, not retrying")
+            break
+        try:
+            result = function(*args, **kwargs)
+            if not (is_failure(result) if is_failure is not None else result is None):
+                return result
+        except Exception as exception:
+            print(exception)
+            result = None
+        if attempt + 1 < max_attempts:
+            delay = get_backoff_delay(attempt, base_delay, max_delay)
+            if deadline is not None and deadline.remaining() <= delay:
+                print(f"Deadline leaves no time to retry {host_name}")
+                mark_timeout()
+                break
+            print(f"Attempt {attempt + 1} for {host_name} failed, retrying in {delay:.1f} seconds")
+            time.sleep(delay)
+    return result
@@ -0,0 +1,200 @@
+import os
+import copy
+import time
+import threading
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+CONFIG_COLLECTION = "automation_airflow_config"
+CONFIG_CACHE_ENABLED = os.getenv('CONFIG_CACHE_ENABLED', 'true').lower() == 'true'
+CONFIG_CACHE_TTL = float(os.getenv('CONFIG_CACHE_TTL', 300))
+# load the whole collection on first use, after which every plain lookup is a dictionary access
+CONFIG_CACHE_PRELOAD = os.getenv('CONFIG_CACHE_PRELOAD', 'true').lower() == 'true'
+# invalidate on changes through a MongoDB change stream (needs a replica set); the TTL still applies
+CONFIG_CACHE_WATCH = os.getenv('CONFIG_CACHE_WATCH', 'false').lower() == 'true'
+CONFIG_WATCH_RETRY_SECONDS = float(os.getenv('CONFIG_WATCH_RETRY_SECONDS', 30))
+
+
+class ConfigCache:
+    """
+    In-process cache of the automation_airflow_config documents.
+    With preloading, the whole collection is read in one query and indexed by its "key" field; lookups with
+    plain equality queries that include "key" (such as {"key": ...} or {"tenantId": ..., "key": ...}) are then
+    answered from the index, including "not found". Other queries, or lookups with a projection, are cached
+    one by one. Everything expires after `ttl` seconds and can be invalidated explicitly or by a change stream.
+    Callers always receive deep copies, so formatting a cached payload in place cannot alter the cache.
+    """
+
+    def __init__(self, ttl=CONFIG_CACHE_TTL, preload=CONFIG_CACHE_PRELOAD, collection_name=CONFIG_COLLECTION):
+        self.ttl = ttl
+        self.preload_enabled = preload
+        self.collection_name = collection_name
+        self._index = None
+        self._index_expires_at = 0.0
+        self._queries = {}
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._watch_thread = None
+        self._stop_event = threading.Event()
+
+    def get_document(self, query, projection=None):
+        """
+        Returns a copy of the first config document matching the query, or None if there is none.
+        Raises:The pymongo error if the collection cannot be read.
+        """
+        # MongoDB is only read outside of _lock, so lookups (and get_cached_document) never wait for a round trip
+        if self.preload_enabled and projection is None and self._is_indexable(query):
+            index = self._get_fresh_index()
+            if index is None:
+                # one thread reloads the collection while the others wait here rather than scanning it too
+                with self._refresh_lock:
+                    index = self._get_fresh_index()
+                    if index is None:
+                        index = self.preload()
+            return copy.deepcopy(self._find_in_index(index, query))
+        cache_key = (self._freeze(query), self._freeze(projection))
+        with self._lock:
+            entry = self._queries.get(cache_key)
+        if entry is None or time.monotonic() >= entry[0]:
+            from zif_mongo_helper import get_collection
+            collection = get_collection(self.collection_name)
+            document = collection.find_one(query, projection) if projection is not None else collection.find_one(query)
+            entry = (time.monotonic() + self.ttl, document)
+            with self._lock:
+                self._queries[cache_key] = entry
+        return copy.deepcopy(entry[1])
+
+    def get_cached_document(self, query):
+        """
+        Looks a query up in the preloaded index without ever reading MongoDB, for callers that must not block
+        (such as coroutines).
+        Returns:tuple: (True, copy of the document or None) if the fresh index answers the query, else (False, None).
+        """
+        # never wait for the lock either, even though it is only held for dictionary accesses
+        if not self._is_indexable(query) or not self._lock.acquire(blocking=False):
+            return False, None
+        try:
+            if self._index is None or time.monotonic() >= self._index_expires_at:
+                return False, None
+            return True, copy.deepcopy(self._find_in_index(self._index, query))
+        finally:
+            self._lock.release()
+
+    def preload(self):
+        """
+        Reads every config document in one query and replaces the index.
+        Returns:dict: The new index.
+        """
+        from zif_mongo_helper import get_collection
+        index = {}
+        for document in get_collection(self.collection_name).find({}):
+            index.setdefault(document.get("key"), []).append(document)
+        with self._lock:
+            self._index = index
+            self._index_expires_at = time.monotonic() + self.ttl
+        return index
+
+    def invalidate(self):
+        """
+        Drops every cached document; the next lookup reads MongoDB again.
+        """
+        with self._lock:
+            self._index = None
+            self._queries = {}
+
+    def start_watch(self):
+        """
+        Starts a background thread that invalidates the cache whenever the config collection changes.
+        """
+        with self._lock:
+            if self._watch_thread is None or not self._watch_thread.is_alive():
+                self._stop_event.clear()
+                self._watch_thread = threading.Thread(target=self._watch, name='config-cache-watch', daemon=True)
+                self._watch_thread.start()
+
+    def stop_watch(self):
+        self._stop_event.set()
+
+    def _watch(self):
+        from zif_mongo_helper import get_collection
+        while not self._stop_event.is_set():
+            try:
+                with get_collection(self.collection_name).watch(max_await_time_ms=1000) as stream:
+                    # changes made while the stream was down are not replayed
+                    self.invalidate()
+                    while not self._stop_event.is_set() and stream.alive:
+                        if stream.try_next() is not None:
+                            self.invalidate()
+            except Exception as exception:
+                print(f"Config change stream failed, relying on the TTL: {exception}")
+                self._stop_event.wait(CONFIG_WATCH_RETRY_SECONDS)
+
+    def _get_fresh_index(self):
+        # an index is never changed once built, only replaced, so it can be searched without the lock
+        with self._lock:
+            return self._index if self._index is not None and time.monotonic() < self._index_expires_at else None
+
+    @staticmethod
+    def _find_in_index(index, query):
+        for document in index.get(query["key"], []):
+            if all(document.get(field) == value for field, value in query.items()):
+                return document
+        return None
+
+    @staticmethod
+    def _is_indexable(query):
+        return isinstance(query, dict) and "key" in query and \
+            not any(isinstance(value, dict) or str(field).startswith('$') for field, value in query.items())
+
+    @classmethod
+    def _freeze(cls, value):
+        if isinstance(value, dict):
+            return tuple(sorted((str(key), cls._freeze(item)) for key, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(cls._freeze(item) for item in value)
+        return value
+
+
+config_cache = ConfigCache()
+
+
+def get_config_document(query, projection=None):
+    """
+    Retrieves a document from automation_airflow_config through the config cache.
+    Args:
+        query (dict): A MongoDB query, e.g. {"tenantId": ..., "key": "CPUMemoryResourceRemediation"}.
+        projection (dict, optional): A projection to specify which fields to include or exclude. Defaults to None.
+    Returns:dict or None: A copy of the first matching document, or None if there is none or an error occurs.
+    """
+    from zif_mongo_helper import get_single_document
+    if not CONFIG_CACHE_ENABLED:
+        return get_single_document(query, CONFIG_COLLECTION, projection)
+    document = None
+    try:
+        document = config_cache.get_document(query, projection)
+    except Exception as exception:
+        print(exception)
+    return document
+
+
+def preload_config():
+    """
+    Loads every config document into the cache, e.g. when a worker starts.
+    """
+    try:
+        config_cache.preload()
+    except Exception as exception:
+        print(exception)
+
+
+def invalidate_config():
+    """
+    Drops the cached config, e.g. after a config document was updated by this process.
+    """
+    config_cache.invalidate()
+
+
+if CONFIG_CACHE_ENABLED and CONFIG_CACHE_WATCH:
+    config_cache.start_watch()
@@ -1,10 +1,9 @@
 import time
-from remote_connection_helper import get_winrm_script_result,get_ssh_script_result,get_ssh_client
-def get_top_cpu_process(host_name,is_ntlm=True):
-        result = None
-        try:
-                if host_name is not None:
-                        command = r"""
+from remote_connection_helper import get_winrm_script_result,get_ssh_script_result,get_pooled_ssh_client,iter_ssh_script_lines,run_ssh_commands_parallel,call_with_retry
+from ssh_shell_helper import get_privileged_script_result
+from process_sample_helper import ProcessSample,CPU,MEMORY,parse_process_rows,get_top_samples,format_process_dicts
+
+WINDOWS_TOP_CPU_PROCESS_SCRIPT = r"""
 Get-Counter '\Process(*)\ID Process','\Process(*)\% Processor Time' -ErrorAction SilentlyContinue |
   ForEach-Object {
     $_.CounterSamples |
@@ -23,6 +22,123 @@ Get-Counter '\Process(*)\ID Process','\Process(*)\% Processor Time' -ErrorAction
       }
   }
 """
+
+WINDOWS_TOTAL_CPU_USAGE_SCRIPT = """
+            $CPUAverage = Get-WmiObject win32_processor | Measure-Object -Property LoadPercentage -Average
+            $AverageValue = $CPUAverage | Select-Object Average
+            $Result =  $AverageValue | Format-Table -HideTableHeaders
+            echo $Result
+            """
+
+WINDOWS_TOP_MEMORY_PROCESS_SCRIPT = r"""
+$TotalMemory = Get-CimInstance -ClassName Win32_ComputerSystem | Select-Object -ExpandProperty TotalPhysicalMemory
+Get-Counter '\Process(*)\ID Process','\Process(*)\Working Set - Private' -ErrorAction SilentlyContinue |
+ForEach-Object {
+$_.CounterSamples |
+Where-Object InstanceName -NotMatch '^(?:idle|_total|system)$' |
+Group-Object {Split-Path $_.Path} |
+ForEach-Object {
+[pscustomobject]@{
+    ProcessId = $_.Group |? Path -like '*\ID Process' |% RawValue
+    ProcessName = $_.Group[0].InstanceName
+    MemoryUsage = $_.Group |? Path -like '*\Working Set - Private' |% CookedValue
+}
+} | Sort-Object MemoryUsage -Descending |
+Select-Object -First 5 |
+ForEach-Object {
+"{0}|||{1}|||{2:P}~~~" -f $_.ProcessId, $_.ProcessName, ($_.MemoryUsage / $TotalMemory)
+}
+}
+"""
+
+WINDOWS_TOTAL_MEMORY_USAGE_SCRIPT = """$Result = gwmi -Class win32_operatingsystem | Select-Object @{Name = 'MemoryUsage'; 
+                Expression = {'{0:N2}' -f ((($_.TotalVisibleMemorySize - $_.FreePhysicalMemory) * 100) / $_.TotalVisibleMemorySize)}}
+                $Result = $Result | Format-Table -HideTableHeaders
+                echo $Result"""
+
+# One CIM query for the formatted per-process counters and one for the OS memory figures. Total CPU is
+# derived from the Idle process (its counter is summed over all cores), so no processor class is queried.
+WINDOWS_METRICS_SNAPSHOT_SCRIPT = r"""
+$ProgressPreference = 'SilentlyContinue'
+$Cores = [Environment]::ProcessorCount
+$OperatingSystem = Get-CimInstance -ClassName Win32_OperatingSystem -Property TotalVisibleMemorySize,FreePhysicalMemory
+$TotalMemory = [double]$OperatingSystem.TotalVisibleMemorySize * 1024
+$Processes = @(Get-CimInstance -ClassName Win32_PerfFormattedData_PerfProc_Process -Property Name,IDProcess,PercentProcessorTime,WorkingSetPrivate)
+$Idle = $Processes | Where-Object Name -eq 'Idle' | Select-Object -First 1
+$Processes = @($Processes | Where-Object Name -NotMatch '^(?:idle|_total|system)$' | ForEach-Object {
+    [pscustomobject]@{ PID = [int]$_.IDProcess; Name = $_.Name; Cpu = [double]$_.PercentProcessorTime / $Cores; Memory = [double]$_.WorkingSetPrivate * 100 / $TotalMemory }
+})
+[pscustomobject]@{
+    Cpu = [math]::Max(0, 100 - [double]$Idle.PercentProcessorTime / $Cores)
+    Memory = ($TotalMemory - [double]$OperatingSystem.FreePhysicalMemory * 1024) * 100 / $TotalMemory
+    TopCpu = @($Processes | Sort-Object Cpu -Descending | Select-Object -First {process_count})
+    TopMemory = @($Processes | Sort-Object Memory -Descending | Select-Object -First {process_count})
+} | ConvertTo-Json -Compress -Depth 3
+"""
+
+# One pass over /proc: the aggregate CPU counters and every process' stat line are read twice, `interval`
+# seconds apart, and CPU shares are computed from the deltas locally. The awk step reduces each stat line to
+# "pid utime+stime starttime rss comm" (comm may contain spaces and parentheses, so it is cut at the last ") ").
+LINUX_PROC_SNAPSHOT_SCRIPT = (
+    "snap() {{ echo '@@SNAP'; head -1 /proc/stat; cat /proc/[0-9]*/stat 2>/dev/null | "
+    "awk '{{ match($0, /.*\\) /); head = substr($0, 1, RLENGTH - 2); split(substr($0, RLENGTH + 1), f, \" \"); "
+    "p = index(head, \" (\"); print substr(head, 1, p - 1), f[12] + f[13], f[20], f[22], substr(head, p + 2) }}'; }}; "
+    "echo \"@@CONF $(getconf PAGESIZE) $(nproc)\"; "
+    "grep -E '^(MemTotal|MemFree|MemAvailable|Buffers|Cached):' /proc/meminfo; "
+    "snap; sleep {interval}; snap"
+)
+
+KILL_GRACE_PERIOD = 5
+
+# Picks the top-N processes and signals them in the same script, so the list cannot change between lookup
+# and kill. The script's own shell, its children and PID 1 are never candidates. With SIGTERM the survivors
+# get SIGKILL once the grace period is over. One "@@KILL|pid|outcome|command" line is printed per process.
+LINUX_KILL_TOP_PROCESS_SCRIPT = r"""
+pids=$(ps -eo pid=,ppid=,sid= --sort=-{sort_key} | awk -v top="$$" -v count={count} '
+{{ order[NR] = $1; parent[$1] = $2; session[$1] = $3 }}
+END {{
+    # never pick this shell, its ancestors (sudo, sshd, ...), its descendants (ps, awk) or its session
+    for (p = top; p > 0 && !(p in keep); p = parent[p]) keep[p] = 1
+    for (i = 1; i <= NR && found < count; i++) {{
+        p = order[i]
+        if (p == 1 || p in keep || session[p] == session[top]) continue
+        depth = 0
+        for (a = parent[p]; a > 1 && a != top && depth < NR; a = parent[a]) depth++
+        if (a == top) continue
+        print p
+        found++
+    }}
+}}')
+sent=""
+names=""
+for pid in $pids; do
+    name=$(cat /proc/$pid/comm 2>/dev/null)
+    names="$names
+$pid $name"
+    if kill -s {signal} $pid 2>/dev/null; then sent="$sent $pid"; else echo "@@KILL|$pid|failed|$name"; fi
+done
+waited=0
+while [ "{signal}" = "TERM" ] && [ -n "$sent" ] && [ $waited -lt {grace_ticks} ]; do
+    alive=""
+    for pid in $sent; do kill -0 $pid 2>/dev/null && alive="$alive $pid"; done
+    [ -z "$alive" ] && break
+    sleep 0.5
+    waited=$((waited + 1))
+done
+for pid in $sent; do
+    name=$(printf '%s\n' "$names" | awk -v pid=$pid '$1 == pid {{ sub(/^[^ ]+ /, ""); print; exit }}')
+    if ! kill -0 $pid 2>/dev/null; then echo "@@KILL|$pid|{signal_label}|$name"
+    elif [ "{signal}" != "TERM" ]; then echo "@@KILL|$pid|{signal_label}|$name"
+    elif kill -s KILL $pid 2>/dev/null; then echo "@@KILL|$pid|SIGKILL|$name"
+    else echo "@@KILL|$pid|failed|$name"; fi
+done
+"""
+
+def get_top_cpu_process(host_name,is_ntlm=True):
+        result = None
+        try:
+                if host_name is not None:
+                        command = WINDOWS_TOP_CPU_PROCESS_SCRIPT
                         result = get_winrm_script_result(host_name, command,is_ntlm)
                         if result is not None:
                                 result = result.strip()
@@ -38,12 +154,7 @@ def get_total_cpu_usage(host_name,is_ntlm=True):
     result = None
     try:
         if host_name is not None:
-            command = """
-            $CPUAverage = Get-WmiObject win32_processor | Measure-Object -Property LoadPercentage -Average
-            $AverageValue = $CPUAverage | Select-Object Average
-            $Result =  $AverageValue | Format-Table -HideTableHeaders
-            echo $Result
-            """
+            command = WINDOWS_TOTAL_CPU_USAGE_SCRIPT
             result = get_winrm_script_result(host_name, command,is_ntlm)
             if result is not None:
                 result = result.strip()
@@ -57,26 +168,7 @@ def get_top_memory_process(host_name,is_ntlm=True):
     result = None
     try:
         if host_name is not None:
-            command = r"""
-$TotalMemory = Get-CimInstance -ClassName Win32_ComputerSystem | Select-Object -ExpandProperty TotalPhysicalMemory
-Get-Counter '\Process(*)\ID Process','\Process(*)\Working Set - Private' -ErrorAction SilentlyContinue |
-ForEach-Object {
-$_.CounterSamples |
-Where-Object InstanceName -NotMatch '^(?:idle|_total|system)$' |
-Group-Object {Split-Path $_.Path} |
-ForEach-Object {
-[pscustomobject]@{
-    ProcessId = $_.Group |? Path -like '*\ID Process' |% RawValue
-    ProcessName = $_.Group[0].InstanceName
-    MemoryUsage = $_.Group |? Path -like '*\Working Set - Private' |% CookedValue
-}
-} | Sort-Object MemoryUsage -Descending |
-Select-Object -First 5 |
-ForEach-Object {
-"{0}|||{1}|||{2:P}~~~" -f $_.ProcessId, $_.ProcessName, ($_.MemoryUsage / $TotalMemory)
-}
-}
-"""
+            command = WINDOWS_TOP_MEMORY_PROCESS_SCRIPT
             result = get_winrm_script_result(host_name, command,is_ntlm)
             if result is not None:
                 result = result.strip()
@@ -91,10 +183,7 @@ def get_total_memory_usage(host_name,is_ntlm=True):
     result = None
     try:
         if host_name is not None:
-            command = """$Result = gwmi -Class win32_operatingsystem | Select-Object @{Name = 'MemoryUsage'; 
-                Expression = {'{0:N2}' -f ((($_.TotalVisibleMemorySize - $_.FreePhysicalMemory) * 100) / $_.TotalVisibleMemorySize)}}
-                $Result = $Result | Format-Table -HideTableHeaders
-                echo $Result"""
+            command = WINDOWS_TOTAL_MEMORY_USAGE_SCRIPT
             result = get_winrm_script_result(host_name, command,is_ntlm)
             if result is not None:
                 result = result.strip()
@@ -102,141 +191,271 @@ def get_total_memory_usage(host_name,is_ntlm=True):
         print(exception)
     return result
 
-def get_top_cpu_consuming_process(host_name, process_count=5):
+def get_windows_metrics_snapshot(host_name, process_count=5, is_ntlm=True):
     """
+    Collects total CPU usage, memory usage and the top CPU and memory consuming processes of a Windows host
+    with a single CIM query against Win32_PerfFormattedData_PerfProc_Process plus Win32_OperatingSystem,
+    in one WinRM round trip. Process CPU shares are relative to the whole machine (all cores).
+    Arguments:
+    - host_name (str): The name or IP address of the remote Windows host.
+    - process_count (int): The number of top processes to return for CPU and for memory.
+    - is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+    Returns:- dict: {"cpu_usage": float, "memory_usage": float, "top_cpu_process": list, "top_memory_process": list}
+    in the same layout as get_linux_metrics_snapshot (the process lists hold ProcessSample entries with both
+    usages set), or None if the snapshot could not be taken.
     """
-    command_result = None
-    cpu_process = []
+    import json
+    snapshot = None
     try:
         if host_name is not None:
-            process_count += 1
-            command = f"ps -eo pid,comm,%cpu --sort=-%cpu | head -{process_count} | awk -v cores=$(nproc) '{{print $1, $2, $3/cores}}'"
-            command_result = get_ssh_script_result(host_name, command)
-            if command_result is not None:
-                command_result.pop(0)
-                for return_result in command_result:
-                    process_list = return_result.split()
-                    cpu_process.append({
-                        "PID": process_list[0],
-                        "COMMAND": ' '.join(process_list[1:len(process_list)-1]),
-                        "CPU USAGE IN %": f"{process_list[len(process_list)-1]}%"
-                    })
+            command = WINDOWS_METRICS_SNAPSHOT_SCRIPT.replace('{process_count}', str(int(process_count)))
+            result = get_winrm_script_result(host_name, command, is_ntlm)
+            if result is None or not result.strip():
+                print(f"No CIM snapshot returned by {host_name}")
+                return None
+            payload = json.loads(result.strip().splitlines()[-1])
+            def get_processes(key):
+                # ConvertTo-Json in Windows PowerShell 5.1 may still unwrap a single element array
+                processes = payload.get(key) or []
+                return [processes] if isinstance(processes, dict) else processes
+            snapshot = {
+                "cpu_usage": round(float(payload["Cpu"]), 2),
+                "memory_usage": round(float(payload["Memory"]), 2),
+                "top_cpu_process": [ProcessSample(process["PID"], process["Name"], process["Cpu"], process["Memory"]) for process in get_processes("TopCpu")],
+                "top_memory_process": [ProcessSample(process["PID"], process["Name"], process["Cpu"], process["Memory"]) for process in get_processes("TopMemory")]
+            }
     except Exception as exception:
         print(exception)
-    return cpu_process
+    return snapshot
 
-def get_top_memory_consuming_process(host_name,process_count=5):
+def get_windows_usage_and_top_process(host_name, alert_type, is_ntlm=True):
     """
+    Fetches the total CPU or memory usage and the top consuming processes of a Windows host in one WinRM
+    round trip. The CIM snapshot (get_windows_metrics_snapshot) is used first; if it fails, the Get-Counter
+    and WMI probes are batched into one call instead.
+    Arguments:
+    - host_name (str): The name or IP address of the remote Windows host.
+    - alert_type (str): 'CPU' or 'MEMORY'.
+    - is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+    Returns- tuple: (total usage as returned by get_total_*_usage, list of ProcessSample); either element is
+    None if its probe failed. format_process_rows turns the samples into the get_top_*_process layout.
     """
-    command_result = None
-    process_count=process_count+1
-    memory_process=[]
+    from winrm_batch_helper import get_winrm_batch_values
+    total_usage, top_process = None, None
     try:
         if host_name is not None:
-            command = "ps -eo pid,command,%mem --sort=-%mem | head -{num}".format(num=process_count)
-            command_result = get_ssh_script_result(host_name, command)
-            if command_result is not None:
-                command_result.pop(0)
-                for return_result in command_result:
-                    process_list = return_result.split()
-                    memory_process.append({"PID":process_list[0],"COMMAND":' '.join(process_list[1:len(process_list)-1]),"MEMORY USAGE IN %":process_list[len(process_list)-1]+"%"})
+            snapshot = get_windows_metrics_snapshot(host_name, is_ntlm=is_ntlm)
+            if snapshot is not None:
+                if alert_type == 'CPU':
+                    return str(snapshot["cpu_usage"]), snapshot["top_cpu_process"]
+                return str(snapshot["memory_usage"]), snapshot["top_memory_process"]
+            if alert_type == 'CPU':
+                probes = {"total": WINDOWS_TOTAL_CPU_USAGE_SCRIPT, "top": WINDOWS_TOP_CPU_PROCESS_SCRIPT}
+            else:
+                probes = {"total": WINDOWS_TOTAL_MEMORY_USAGE_SCRIPT, "top": WINDOWS_TOP_MEMORY_PROCESS_SCRIPT}
+            probe_values = get_winrm_batch_values(host_name, probes, is_ntlm)
+            if probe_values.get("total") is not None:
+                total_usage = probe_values["total"].strip()
+            if probe_values.get("top") is not None:
+                top_process = parse_process_rows(probe_values["top"], alert_type)
     except Exception as exception:
         print(exception)
-    return memory_process
+    return total_usage, top_process
+
+def get_linux_cpu_process_command(process_count):
+    """
+    Returns the ps pipeline listing the top CPU consuming processes (header plus process_count rows), with
+    the CPU share normalized by the number of cores.
+    """
+    return f"ps -eo pid,comm,%cpu --sort=-%cpu | head -{process_count + 1} | awk -v cores=$(nproc) '{{print $1, $2, $3/cores}}'"
+
+def parse_linux_cpu_process_lines(command_result):
+    """
+    Converts the output lines of get_linux_cpu_process_command (header first) into ProcessSample entries.
+    """
+    cpu_process = []
+    for return_result in command_result[1:]:
+        process_list = return_result.split()
+        if len(process_list) < 3 or not process_list[0].isdigit():
+            continue
+        cpu_process.append(ProcessSample(process_list[0], ' '.join(process_list[1:len(process_list)-1]), cpu_usage=process_list[len(process_list)-1]))
+    return cpu_process
 
-def kill_cpu_consuming_process(host_name,kill_count):
+def get_linux_top_process_samples(host_name, alert_type=CPU, process_count=5):
     """
-    Terminates the top CPU-consuming processes on a remote Linux host. The function retrieves the process 
-    IDs of the specified number of top CPU-consuming processes and sends a kill signal to terminate them.
+    Lists the top CPU or memory consuming processes of a Linux host with ps.
     Arguments:
     - host_name (str): The name or IP address of the remote Linux host.
-    - kill_count (int): The number of top CPU-consuming processes to terminate.
-    Returns- list: A list of dictionaries containing process ID and the result of the kill command. Returns an empty list if an error occurs.
+    - alert_type (str): 'CPU' or 'MEMORY'.
+    - process_count (int): The number of top processes to return.
+    Returns:- list: ProcessSample entries, highest usage first. Returns an empty list if an error occurs.
     """
-    command_result = None
-    kill_count=kill_count+1
-    return_result=[]
+    processes = []
     try:
-        get_pid="ps -eo pid --sort=-%cpu | head -{num}".format(num=kill_count)
-        top_pid=get_ssh_script_result(host_name, get_pid)
-        if top_pid is not None:
-           top_pid.pop(0)
-           for id in top_pid:
-               command="kill -9 {pid}".format(pid=id)
-               command_result = get_ssh_script_result(host_name, command)
-               return_result.append({"PID":id,"RESULT":command_result})
+        if host_name is not None and alert_type == MEMORY:
+            command = "ps -eo pid,command,%mem --sort=-%mem | head -{num}".format(num=process_count + 1)
+            command_result = get_privileged_script_result(host_name, command)
+            for return_result in (command_result or [])[1:]:
+                process_list = return_result.split()
+                if len(process_list) >= 3 and process_list[0].isdigit():
+                    processes.append(ProcessSample(process_list[0], ' '.join(process_list[1:len(process_list)-1]), memory_usage=process_list[len(process_list)-1]))
+        elif host_name is not None:
+            command = get_linux_cpu_process_command(process_count)
+            # stream the output and stop reading once the header and process_count rows have arrived
+            command_result = list(iter_ssh_script_lines(host_name, command, max_lines=process_count + 1))
+            if command_result:
+                processes = parse_linux_cpu_process_lines(command_result)
     except Exception as exception:
         print(exception)
-    return return_result
+    return processes
+
+def get_top_process_samples(host_name, alert_type=CPU, is_linux=False, process_count=5, is_ntlm=True):
+    """
+    Returns the top CPU or memory consuming processes of a Linux or Windows host as ProcessSample entries,
+    or None if the Windows probe failed. On Windows the Get-Counter scripts always list five processes.
+    """
+    if is_linux:
+        return get_linux_top_process_samples(host_name, alert_type, process_count)
+    result = get_top_memory_process(host_name, is_ntlm) if alert_type == MEMORY else get_top_cpu_process(host_name, is_ntlm)
+    return None if result is None else parse_process_rows(result, alert_type)
+
+def get_top_cpu_consuming_process(host_name, process_count=5):
+    """
+    """
+    return format_process_dicts(get_linux_top_process_samples(host_name, CPU, process_count), CPU)
 
-def kill_memory_consuming_process(host_name,kill_count):
+def get_linux_cpu_usage_and_top_process(host_name, process_count=5):
     """
-    Terminates the top memory-consuming processes on a remote Linux host. The function retrieves the 
-    process IDs of the specified number of top memory-consuming processes and sends a kill signal to 
-    terminate them.
+    Samples the average CPU consumption of a Linux host (three top samples, two seconds apart) and lists
+    its top CPU consuming processes at the same time, as two channels on one SSH connection. The process
+    list is therefore taken inside the sampling window instead of after it.
     Arguments:
     - host_name (str): The name or IP address of the remote Linux host.
-    - kill_count (int): The number of top memory-consuming processes to terminate.
-    Returns-list: A list of dictionaries containing process ID and the result of the kill command. Returns an 
+    - process_count (int): The number of top processes to return.
+    Returns:- tuple: (average CPU consumption as string or None, list of ProcessSample).
+    """
+    average_cpu_consumption, cpu_process = None, []
+    try:
+        if host_name is not None:
+            sample_command = "for i in 1 2 3; do top -b -n1 | grep 'Cpu(s)' | awk '{print $2 + $4}'; [ $i -lt 3 ] && sleep 2; done"
+            sample_result, process_result = run_ssh_commands_parallel(host_name, [sample_command, get_linux_cpu_process_command(process_count)])
+            samples = [float(line) for line in sample_result["stdout"] if line]
+            if samples:
+                average_cpu_consumption = str(sum(samples) / len(samples))
+            else:
+                print(f"CPU sampling failed on {host_name}: {sample_result['error'] or sample_result['stderr']}")
+            if process_result["stdout"]:
+                cpu_process = parse_linux_cpu_process_lines(process_result["stdout"])
+            else:
+                print(f"Process listing failed on {host_name}: {process_result['error'] or process_result['stderr']}")
+    except Exception as exception:
+        print(exception)
+    return average_cpu_consumption, cpu_process
+
+def get_top_memory_consuming_process(host_name,process_count=5):
+    """
+    """
+    return format_process_dicts(get_linux_top_process_samples(host_name, MEMORY, process_count), MEMORY)
+
+def kill_top_processes(host_name, kill_count, sort_by='cpu', signal_name='TERM', grace_period=KILL_GRACE_PERIOD):
+    """
+    Picks the top CPU or memory consuming processes on a remote Linux host and signals them in one remote
+    script run in the privileged shell, so the whole batch costs a single round trip and the process list
+    cannot change between lookup and kill. With SIGTERM, processes still alive after `grace_period`
+    seconds are sent SIGKILL. The script never picks its own shell, that shell's ancestors (sudo, sshd) and
+    descendants, or any other process of its session.
+    Arguments:
+    - host_name (str): The name or IP address of the remote Linux host.
+    - kill_count (int): The number of top processes to signal.
+    - sort_by (str): 'cpu' or 'memory'.
+    - signal_name (str): The signal to send first, e.g. 'TERM', 'KILL' or 'HUP'.
+    - grace_period (float): Seconds to wait after SIGTERM before escalating to SIGKILL.
+    Returns-list: One dictionary per process with "PID", "COMMAND" and "RESULT", where RESULT is the signal
+    that ended it (e.g. 'SIGTERM', 'SIGKILL'), the signal sent for other signals, or 'failed'. Returns an
     empty list if an error occurs.
     """
-    command_result = None
-    kill_count=kill_count+1
-    return_result=[]
+    return_result = []
     try:
-        get_pid="ps -eo pid --sort=-%mem | head -{num}".format(num=kill_count)
-        top_pid=get_ssh_script_result(host_name, get_pid)
-        if top_pid is not None:
-            top_pid.pop(0)
-            for id in top_pid:
-                command="kill -9 {pid}".format(pid=id)
-                command_result = get_ssh_script_result(host_name, command)
-                return_result.append({"PID":id,"RESULT":command_result})
+        signal_name = str(signal_name).upper()
+        if signal_name.startswith('SIG'):
+            signal_name = signal_name[3:]
+        if not signal_name.isalnum():
+            print(f"Invalid signal {signal_name}")
+            return return_result
+        command = LINUX_KILL_TOP_PROCESS_SCRIPT.format(
+            sort_key='%mem' if sort_by == 'memory' else '%cpu', count=int(kill_count), signal=signal_name,
+            signal_label=f"SIG{signal_name}", grace_ticks=int(float(grace_period) * 2))
+        command_result = get_privileged_script_result(host_name, command)
+        for line in command_result or []:
+            if line.startswith('@@KILL|'):
+                _, pid, outcome, name = line.split('|', 3)
+                return_result.append({"PID": pid, "COMMAND": name, "RESULT": outcome})
     except Exception as exception:
         print(exception)
     return return_result
 
+def kill_cpu_consuming_process(host_name,kill_count,signal_name='TERM',grace_period=KILL_GRACE_PERIOD):
+    """
+    Terminates the top CPU-consuming processes on a remote Linux host. The processes are looked up and
+    signalled in a single remote script, see kill_top_processes.
+    Arguments:
+    - host_name (str): The name or IP address of the remote Linux host.
+    - kill_count (int): The number of top CPU-consuming processes to terminate.
+    - signal_name (str): The signal to send first; SIGTERM escalates to SIGKILL after grace_period seconds.
+    Returns- list: A list of dictionaries containing process ID, process name and the outcome of the kill. Returns an empty list if an error occurs.
+    """
+    return kill_top_processes(host_name, kill_count, 'cpu', signal_name, grace_period)
+
+def kill_memory_consuming_process(host_name,kill_count,signal_name='TERM',grace_period=KILL_GRACE_PERIOD):
+    """
+    Terminates the top memory-consuming processes on a remote Linux host. The processes are looked up and
+    signalled in a single remote script, see kill_top_processes.
+    Arguments:
+    - host_name (str): The name or IP address of the remote Linux host.
+    - kill_count (int): The number of top memory-consuming processes to terminate.
+    - signal_name (str): The signal to send first; SIGTERM escalates to SIGKILL after grace_period seconds.
+    Returns-list: A list of dictionaries containing process ID, process name and the outcome of the kill. Returns an
+    empty list if an error occurs.
+    """
+    return kill_top_processes(host_name, kill_count, 'memory', signal_name, grace_period)
+
+def get_linux_cpu_sample_average(host_name):
+    """
+    Takes three CPU usage samples on a remote Linux host, two seconds apart, on the pooled SSH connection
+    and returns their average. This is a single attempt; get_top_cpu_consuming adds the retries.
+    Returns:- str: The average CPU consumption as a string, or None if the samples could not be taken.
+    """
+    command = "top -b -n1 | grep 'Cpu(s)' | awk '{print $2 + $4}'"
+    client = get_pooled_ssh_client(host_name)
+    if client is None:
+        print(f"SSH client for {host_name} is unavailable")
+        return None
+    total_cpu_consumption = 0
+    for i in range(3):
+        stdin, stdout, stderr = client.exec_command(command)
+        cpu_consumption = float(stdout.read().decode('utf-8').strip())
+        print(f"cpu sample {i} is {cpu_consumption} ")
+        total_cpu_consumption += cpu_consumption
+        if i < 2:
+            time.sleep(2)
+    return str(total_cpu_consumption / 3)
+
 def get_top_cpu_consuming(host_name,retry_count):
 
     """
     Calculates the average CPU consumption on a remote Linux host over three samples. The function executes 
     a command over SSH to retrieve the CPU usage percentage and averages the results, retrying up to the 
-    specified number of times if the operation fails.
+    specified number of times if the operation fails. Retries back off exponentially with jitter and stop
+    as soon as the host's circuit breaker opens.
     Arguments:
     - host_name (str): The name or IP address of the remote Linux host.
-    - retry_count (int): The number of times to retry the operation if it fails.
+    - retry_count (int): The maximum number of attempts.
     Returns:- str: The average CPU consumption as a string. Returns None if an error occurs.
     """
     average_cpu_consumption = None
     try:
         if host_name and retry_count is not None:
-            success = False
-            command = "top -b -n1 | grep 'Cpu(s)' | awk '{print $2 + $4}'"
-            num_retries = 0
-            while not success and num_retries < int(retry_count):
-                try:
-                    client = get_ssh_client(host_name)
-                    if client is not None:
-                        total_cpu_consumption = 0
-                        for i in range(3):
-                            stdin, stdout, stderr = client.exec_command(command)
-                            if stdout is not None:
-                                cpu_consumption = float(stdout.read().decode('utf-8').strip())
-                                if cpu_consumption is not None and type(cpu_consumption) == float:
-                                    print(f"cpu at {num_retries } is {cpu_consumption} ")
-                                    total_cpu_consumption += cpu_consumption
-                                    time.sleep(2)
-                                else:
-                                    print("cpu_consumption is none")
-                        average_cpu_consumption = str(total_cpu_consumption / 3)
-                        success = True
-                    else:
-                        print(f"client failed retrying for {num_retries} time")
-                        num_retries += 1
-                except Exception as exception:
-                    print(exception)
-                    print(f"retrying for {num_retries} time")
-                    num_retries += 1
+            average_cpu_consumption = call_with_retry(host_name, get_linux_cpu_sample_average, host_name, max_attempts=int(retry_count))
         else:
             print("2 none")
     except Exception as exception:
@@ -257,7 +476,7 @@ def get_top_memory_consuming(host_name,retry_count):
     try:
         if host_name and retry_count is not None:
             command = "free | awk 'FNR == 2 {used = $3 / $2 * 100.0; print used}'"
-            memory_result = get_ssh_script_result(host_name,command)
+            memory_result = get_privileged_script_result(host_name,command)
             if memory_result is not None and len(memory_result) > 0:
                 result = memory_result[0]
             else:
@@ -267,3 +486,77 @@ def get_top_memory_consuming(host_name,retry_count):
     except Exception as exception:
         print(exception)
     return result
+
+def parse_linux_proc_snapshot(lines):
+    """
+    Parses the output of LINUX_PROC_SNAPSHOT_SCRIPT.
+    Returns:
+        tuple: (page_size, cpu_count, meminfo, snapshots) where meminfo maps the /proc/meminfo keys to kB and
+        each snapshot is (cpu_counters, {(pid, starttime): (cpu_ticks, rss_pages, comm)}).
+    """
+    page_size, cpu_count, meminfo, snapshots = 4096, 1, {}, []
+    for line in lines:
+        if line.startswith('@@CONF'):
+            fields = line.split()
+            page_size, cpu_count = int(fields[1]), int(fields[2])
+        elif line.startswith('@@SNAP'):
+            snapshots.append((None, {}))
+        elif not snapshots and ':' in line:
+            key, value = line.split(':', 1)
+            meminfo[key.strip()] = int(value.split()[0])
+        elif snapshots and line.startswith('cpu '):
+            snapshots[-1] = ([int(value) for value in line.split()[1:]], snapshots[-1][1])
+        elif snapshots:
+            fields = line.split(None, 4)
+            if len(fields) == 5 and fields[0].isdigit():
+                snapshots[-1][1][(fields[0], fields[2])] = (int(fields[1]), int(fields[3]), fields[4])
+    return page_size, cpu_count, meminfo, snapshots
+
+def get_linux_metrics_snapshot(host_name, process_count=5, interval=1):
+    """
+    Collects total CPU usage, memory usage and the top CPU and memory consuming processes of a Linux host
+    in one remote call. /proc/stat and the stat file of every process are read twice, `interval` seconds
+    apart, together with /proc/meminfo; CPU percentages come from the deltas between the two readings.
+    Process CPU shares are relative to the whole machine (all cores), like get_top_cpu_consuming_process.
+    Arguments:
+    - host_name (str): The name or IP address of the remote Linux host.
+    - process_count (int): The number of top processes to return for CPU and for memory.
+    - interval (float): Seconds between the two readings.
+    Returns:- dict: {"cpu_usage": float, "memory_usage": float, "top_cpu_process": list, "top_memory_process": list},
+    with the process lists holding ProcessSample entries (both usages set), or None if the snapshot could not
+    be taken. format_process_dicts turns them into the layout of get_top_cpu_consuming_process.
+    """
+    snapshot = None
+    try:
+        if host_name is not None:
+            command_result = get_ssh_script_result(host_name, LINUX_PROC_SNAPSHOT_SCRIPT.format(interval=interval), sudo_access=False)
+            if command_result is None:
+                print(f"No /proc snapshot returned by {host_name}")
+                return None
+            page_size, cpu_count, meminfo, snapshots = parse_linux_proc_snapshot(command_result)
+            if len(snapshots) != 2 or snapshots[0][0] is None or snapshots[1][0] is None or 'MemTotal' not in meminfo:
+                print(f"Incomplete /proc snapshot returned by {host_name}")
+                return None
+            (first_cpu, first_processes), (second_cpu, second_processes) = snapshots
+            # user..steal; guest time is already included in user
+            total_delta = sum(second_cpu[:8]) - sum(first_cpu[:8])
+            idle_delta = sum(second_cpu[3:5]) - sum(first_cpu[3:5])
+            cpu_usage = 100.0 * (total_delta - idle_delta) / total_delta if total_delta > 0 else 0.0
+            memory_total = meminfo['MemTotal']
+            memory_available = meminfo.get('MemAvailable', meminfo.get('MemFree', 0) + meminfo.get('Buffers', 0) + meminfo.get('Cached', 0))
+            memory_usage = 100.0 * (memory_total - memory_available) / memory_total
+            processes = []
+            for key, (cpu_ticks, rss_pages, comm) in second_processes.items():
+                previous = first_processes.get(key)
+                cpu_share = 100.0 * (cpu_ticks - previous[0]) / total_delta if previous is not None and total_delta > 0 else 0.0
+                memory_share = 100.0 * rss_pages * page_size / (memory_total * 1024)
+                processes.append(ProcessSample(key[0], comm, cpu_share, memory_share))
+            snapshot = {
+                "cpu_usage": round(cpu_usage, 2),
+                "memory_usage": round(memory_usage, 2),
+                "top_cpu_process": get_top_samples(processes, process_count, CPU),
+                "top_memory_process": get_top_samples(processes, process_count, MEMORY)
+            }
+    except Exception as exception:
+        print(exception)
+    return snapshot
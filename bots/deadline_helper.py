@@ -0,0 +1,182 @@
+import os
+import time
+import socket
+import threading
+import contextvars
+from contextlib import contextmanager
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+REMOTE_CONNECT_TIMEOUT = float(os.getenv('REMOTE_CONNECT_TIMEOUT', 15))
+REMOTE_READ_TIMEOUT = float(os.getenv('REMOTE_READ_TIMEOUT', 300))
+MIN_STEP_TIMEOUT = 0.5
+TIMEOUT = "Timeout"
+
+_current_deadline = contextvars.ContextVar('remote_deadline', default=None)
+
+
+class Deadline:
+    """
+    An absolute point in time by which a remote operation has to be finished.
+    Every connect, exec, read and retry step asks the deadline for what is left of the budget, and a step that
+    ran out of time marks the deadline as timed out so the caller can report "Timeout" instead of a failure.
+    """
+
+    def __init__(self, budget):
+        self.budget = float(budget)
+        self.expires_at = time.monotonic() + self.budget
+        self.timed_out = False
+        self._abort_callbacks = []
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """
+        Returns the number of seconds left, never less than 0.
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def get_timeout(self, default=None):
+        """
+        Returns the timeout for the next step: the remaining budget, capped at `default` when one is given.
+        """
+        remaining = self.remaining()
+        if default is not None:
+            remaining = min(remaining, default)
+        return max(MIN_STEP_TIMEOUT, remaining)
+
+    def add_abort_callback(self, callback):
+        """
+        Registers callback() to be run by abort, e.g. to close the session or channel a call is blocked on.
+        """
+        with self._lock:
+            self._abort_callbacks.append(callback)
+
+    def remove_abort_callback(self, callback):
+        with self._lock:
+            if callback in self._abort_callbacks:
+                self._abort_callbacks.remove(callback)
+
+    def abort(self):
+        """
+        Marks the deadline as timed out and runs the registered abort callbacks. Called when the caller stops
+        waiting for a call that is still running, so the call gives up its session instead of holding it.
+        """
+        self.timed_out = True
+        with self._lock:
+            callbacks, self._abort_callbacks = self._abort_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exception:
+                print(exception)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised to a caller that stopped waiting for a remote call because its deadline ran out. The status of
+    such a call is TIMEOUT.
+    """
+    status = TIMEOUT
+
+
+@contextmanager
+def deadline_context(budget):
+    """
+    Context manager that bounds every remote call made inside the block (including calls run on the remote
+    execution engine's workers) by `budget` seconds in total. A nested context never extends the deadline
+    of an enclosing one.
+    Yields:Deadline: The deadline in effect for the block.
+    """
+    outer_deadline = _current_deadline.get()
+    deadline = Deadline(budget)
+    if outer_deadline is not None and outer_deadline.expires_at <= deadline.expires_at:
+        deadline = outer_deadline
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def get_current_deadline():
+    """
+    Returns the Deadline of the enclosing deadline_context, or None outside of one.
+    """
+    return _current_deadline.get()
+
+
+def get_step_timeout(default):
+    """
+    Returns the timeout to use for one connect, exec or read step: `default` outside of a deadline_context,
+    otherwise the remaining budget capped at `default`.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return deadline.get_timeout(default)
+
+
+def is_deadline_expired():
+    """
+    Returns True if the enclosing deadline has passed. The deadline is marked as timed out, so callers can
+    simply skip the step and return.
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.expired():
+        deadline.timed_out = True
+        return True
+    return False
+
+
+def is_timeout_error(exception):
+    """
+    Returns True for the timeout exceptions raised by sockets, paramiko, requests/urllib3 and pywinrm.
+    """
+    if isinstance(exception, (socket.timeout, TimeoutError)):
+        return True
+    return any('Timeout' in exception_type.__name__ for exception_type in type(exception).__mro__)
+
+
+def mark_timeout(exception=None):
+    """
+    Marks the enclosing deadline as timed out when `exception` is a timeout (or unconditionally without one).
+    Returns:bool: True if a timeout was recorded.
+    """
+    if exception is not None and not is_timeout_error(exception):
+        return False
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.timed_out = True
+    return True
+
+
+def run_with_deadline(budget, function, *args, **kwargs):
+    """
+    Runs function(*args, **kwargs) inside a deadline_context of `budget` seconds and reports how it ended.
+    Args:
+        budget (float): The overall time budget in seconds for every remote step the function makes.
+        function (callable): A helper such as get_winrm_script_result or get_ssh_script_result.
+    Returns:
+        dict: {"status": "Success"/"Failure"/"Timeout", "result": the function's return value, "elapsed": seconds}.
+        "Timeout" is reported instead of "Failure" when the function returned nothing because a step ran out
+        of time or the budget was used up.
+    """
+    start_time = time.monotonic()
+    function_result = {"status": "Failure", "result": None, "elapsed": None}
+    with deadline_context(budget) as deadline:
+        try:
+            function_result["result"] = function(*args, **kwargs)
+        except Exception as exception:
+            print(exception)
+            mark_timeout(exception)
+        if function_result["result"] is not None:
+            function_result["status"] = "Success"
+        elif deadline.timed_out or deadline.expired():
+            function_result["status"] = TIMEOUT
+    function_result["elapsed"] = round(time.monotonic() - start_time, 3)
+    return function_result
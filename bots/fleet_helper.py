@@ -0,0 +1,202 @@
+import time
+from concurrent.futures import as_completed, TimeoutError as FutureTimeoutError
+
+
+def get_fleet_hosts(hosts, is_linux=False):
+    """
+    Normalizes a fleet host list into (host_name, is_linux) pairs.
+    Args:
+        hosts (list): Host names, or device_config style dictionaries with 'hostName' and optionally 'isLinux'.
+        is_linux (bool): The OS assumed for entries that do not carry their own 'isLinux' flag.
+    Returns:list: A list of (host_name, is_linux) tuples, skipping entries without a host name.
+    """
+    fleet_hosts = []
+    for host in hosts or []:
+        if isinstance(host, dict):
+            host_name = host.get('hostName')
+            host_is_linux = bool(host.get('isLinux', is_linux))
+        else:
+            host_name = host
+            host_is_linux = bool(is_linux)
+        if host_name:
+            fleet_hosts.append((host_name, host_is_linux))
+    return fleet_hosts
+
+
+def run_host_command(host_name, command_text, is_linux, sudo_access=True, is_ntlm=True):
+    """
+    Runs one command on one host and wraps the outcome into a fleet result record.
+    Linux hosts are reached over SSH and Windows hosts over WinRM. The call blocks, it is meant to be run on
+    the remote execution engine's worker pool.
+    Args:
+        host_name (str): The IP address or host name of the remote machine.
+        command_text (str): The shell (Linux) or PowerShell (Windows) command to execute.
+        is_linux (bool): Selects SSH when True, WinRM otherwise.
+        sudo_access (bool): Whether Linux commands are run with sudo.
+        is_ntlm (bool): If True, NTLM authentication is used for WinRM.
+    Returns:
+        dict: {"hostName", "isLinux", "status", "result", "error", "elapsed"} where status is "Success" when
+        the command produced output, "Timeout" when it ran out of the enclosing deadline and "Failure"
+        otherwise, and elapsed is the call duration in seconds.
+    """
+    from remote_connection_helper import execute_ssh_script, execute_winrm_script
+    from deadline_helper import get_current_deadline, mark_timeout, TIMEOUT
+    fleet_result = {"hostName": host_name, "isLinux": is_linux, "status": "Failure", "result": None, "error": None, "elapsed": None}
+    start_time = time.monotonic()
+    try:
+        if is_linux:
+            fleet_result["result"] = execute_ssh_script(host_name, command_text, sudo_access)
+        else:
+            fleet_result["result"] = execute_winrm_script(host_name, command_text, is_ntlm)
+        if fleet_result["result"] is not None:
+            fleet_result["status"] = "Success"
+    except Exception as exception:
+        print(exception)
+        mark_timeout(exception)
+        fleet_result["error"] = str(exception)
+    deadline = get_current_deadline()
+    if fleet_result["status"] != "Success" and deadline is not None and (deadline.timed_out or deadline.expired()):
+        fleet_result["status"] = TIMEOUT
+    fleet_result["elapsed"] = round(time.monotonic() - start_time, 3)
+    return fleet_result
+
+
+def run_fleet_command(hosts, command_text, is_linux=False, sudo_access=True, is_ntlm=True, host_function=None, budget=None):
+    """
+    Runs the same command on many hosts in parallel and yields each host's result as soon as it completes.
+    Every host is submitted to the remote execution engine, so the fan-out is bounded by its global and
+    per-host concurrency limits. Results come back in completion order, which lets callers start processing
+    while the slowest hosts are still running. If the caller stops iterating early, hosts that have not been
+    started yet are cancelled. With a budget, every host has to finish within `budget` seconds of the
+    fan-out starting, queueing included, and hosts that do not are reported with status "Timeout".
+    Args:
+        hosts (list): Host names, or device_config style dictionaries with 'hostName' and optionally 'isLinux'.
+        command_text (str): The shell (Linux) or PowerShell (Windows) command to execute on every host.
+        is_linux (bool): The OS assumed for entries that do not carry their own 'isLinux' flag.
+        sudo_access (bool): Whether Linux commands are run with sudo.
+        is_ntlm (bool): If True, NTLM authentication is used for WinRM.
+        host_function (callable): Optional replacement for run_host_command with the same signature.
+        budget (float): Optional time budget in seconds for the whole fan-out.
+    Yields:
+        dict: One result record per host, see run_host_command.
+    """
+    from async_remote_helper import remote_execution_engine
+    from deadline_helper import deadline_context
+    host_function = host_function or run_host_command
+    futures = {}
+    expires_at = time.monotonic() + budget if budget is not None else None
+    try:
+        for host_name, host_is_linux in get_fleet_hosts(hosts, is_linux):
+            if expires_at is None:
+                future = remote_execution_engine.submit(host_name, host_function, host_name, command_text, host_is_linux, sudo_access, is_ntlm)
+            else:
+                # every host gets its own deadline (ending at the same time), so one host timing out does not mark the others
+                with deadline_context(max(0, expires_at - time.monotonic())):
+                    future = remote_execution_engine.submit(host_name, host_function, host_name, command_text, host_is_linux, sudo_access, is_ntlm)
+            futures[future] = (host_name, host_is_linux)
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=max(0, expires_at - time.monotonic()) if expires_at is not None else None):
+                pending.discard(future)
+                host_name, host_is_linux = futures[future]
+                try:
+                    fleet_result = future.result()
+                    if fleet_result is None:
+                        # the engine drops calls whose deadline passed while they were queued
+                        fleet_result = {"hostName": host_name, "isLinux": host_is_linux, "status": "Timeout", "result": None,
+                                        "error": "Deadline passed before the command was started", "elapsed": None}
+                    yield fleet_result
+                except Exception as exception:
+                    print(exception)
+                    yield {"hostName": host_name, "isLinux": host_is_linux, "status": "Failure", "result": None, "error": str(exception), "elapsed": None}
+        except FutureTimeoutError:
+            for future in pending:
+                future.cancel()
+                host_name, host_is_linux = futures[future]
+                yield {"hostName": host_name, "isLinux": host_is_linux, "status": "Timeout", "result": None,
+                       "error": "Command did not finish within the fleet budget", "elapsed": None}
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def get_fleet_command_results(hosts, command_text, is_linux=False, sudo_access=True, is_ntlm=True, budget=None):
+    """
+    Collects run_fleet_command into a dictionary keyed by host name.
+    Returns:dict: {host_name: result record} for every host in the fleet.
+    """
+    return {fleet_result["hostName"]: fleet_result for fleet_result in run_fleet_command(hosts, command_text, is_linux, sudo_access, is_ntlm, budget=budget)}
+
+
+def get_host_top_processes(host_name, is_linux, alert_type='CPU', process_count=5, is_ntlm=True):
+    """
+    Fetches the top CPU or memory consuming processes of one host (see cpu_memory_process.get_top_process_samples).
+    Returns:list: (usage, pid, command) tuples, or None if the host could not be queried.
+    """
+    from cpu_memory_process import get_top_process_samples
+    samples = get_top_process_samples(host_name, alert_type, is_linux, process_count, is_ntlm)
+    if not samples:
+        return None
+    return [(sample.get_usage(alert_type), sample.pid, sample.command) for sample in samples if sample.get_usage(alert_type) is not None]
+
+
+def get_fleet_top_processes(hosts, alert_type='CPU', top_n=10, process_count=5, is_linux=False, is_ntlm=True, budget=None):
+    """
+    Builds a fleet-wide leaderboard of the processes using the most CPU or memory.
+    Every host is queried in parallel through the remote execution engine for its own top `process_count`
+    processes, and the results are merged as they arrive into a bounded min-heap of `top_n` entries, so the
+    merge costs O(log top_n) per process whatever the size of the fleet.
+    Args:
+        hosts (list): Host names, or device_config style dictionaries with 'hostName' and optionally 'isLinux'.
+        alert_type (str): 'CPU' or 'MEMORY'.
+        top_n (int): The number of processes in the leaderboard.
+        process_count (int): The number of top processes fetched from every host.
+        is_linux (bool): The OS assumed for entries that do not carry their own 'isLinux' flag.
+        is_ntlm (bool): If True, NTLM authentication is used for WinRM.
+        budget (float): Optional time budget in seconds for the whole fan-out; hosts that have not answered
+            when it runs out are reported as timed out and left out.
+    Returns:
+        list: Up to top_n dictionaries {"hostName", "PID", "COMMAND", "USAGE"} sorted by usage, highest first.
+        USAGE is the percentage of the host's CPU or memory as a float.
+    """
+    import heapq
+    from async_remote_helper import remote_execution_engine
+    from deadline_helper import deadline_context, TIMEOUT
+    leaderboard = []
+    futures = {}
+    expires_at = time.monotonic() + budget if budget is not None else None
+    try:
+        for host_name, host_is_linux in get_fleet_hosts(hosts, is_linux):
+            if expires_at is None:
+                future = remote_execution_engine.submit(host_name, get_host_top_processes, host_name, host_is_linux, alert_type, process_count, is_ntlm)
+            else:
+                with deadline_context(max(0, expires_at - time.monotonic())):
+                    future = remote_execution_engine.submit(host_name, get_host_top_processes, host_name, host_is_linux, alert_type, process_count, is_ntlm)
+            futures[future] = host_name
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=max(0, expires_at - time.monotonic()) if expires_at is not None else None):
+                pending.discard(future)
+                host_name = futures[future]
+                try:
+                    host_processes = future.result()
+                except Exception as exception:
+                    print(exception)
+                    host_processes = None
+                if host_processes is None:
+                    print(f"No process list from {host_name}")
+                    continue
+                for usage, pid, command in host_processes:
+                    entry = (usage, host_name, pid, command)
+                    if len(leaderboard) < top_n:
+                        heapq.heappush(leaderboard, entry)
+                    elif entry > leaderboard[0]:
+                        heapq.heapreplace(leaderboard, entry)
+        except FutureTimeoutError:
+            for future in pending:
+                print(f"No process list from {futures[future]}: {TIMEOUT}")
+    finally:
+        for future in futures:
+            future.cancel()
+    return [{"hostName": host_name, "PID": pid, "COMMAND": command, "USAGE": usage}
+            for usage, host_name, pid, command in sorted(leaderboard, reverse=True)]
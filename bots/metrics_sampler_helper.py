@@ -0,0 +1,249 @@
+import os
+import time
+import threading
+from array import array
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+# read by init_metrics_sampler, which the worker entry point calls; importing this module never starts polling
+METRICS_SAMPLER_ENABLED = os.getenv('METRICS_SAMPLER_ENABLED', 'false').lower() == 'true'
+# comma separated host names, each optionally suffixed with ':linux' or ':windows' (default windows)
+METRICS_SAMPLER_HOSTS = os.getenv('METRICS_SAMPLER_HOSTS', '')
+METRICS_SAMPLER_INTERVAL = float(os.getenv('METRICS_SAMPLER_INTERVAL', 30))
+METRICS_SAMPLER_CAPACITY = int(os.getenv('METRICS_SAMPLER_CAPACITY', 120))
+METRICS_SAMPLER_MAX_AGE = float(os.getenv('METRICS_SAMPLER_MAX_AGE', 90))
+
+
+class MetricRingBuffer:
+    """
+    Fixed-size history of (timestamp, cpu, memory) samples for one host.
+    The values live in three preallocated array('d') columns that are overwritten in a circle, so a host
+    costs 24 bytes per sample whatever its uptime, and the columns can be handed to NumPy without conversion.
+    """
+
+    def __init__(self, capacity=METRICS_SAMPLER_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self.timestamps = array('d', bytes(8 * self.capacity))
+        self.cpu = array('d', bytes(8 * self.capacity))
+        self.memory = array('d', bytes(8 * self.capacity))
+        self.count = 0
+        self._next = 0
+
+    def append(self, timestamp, cpu_usage, memory_usage):
+        self.timestamps[self._next] = timestamp
+        self.cpu[self._next] = cpu_usage
+        self.memory[self._next] = memory_usage
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def get_latest(self):
+        """
+        Returns:tuple or None: (timestamp, cpu_usage, memory_usage) of the newest sample.
+        """
+        if not self.count:
+            return None
+        index = (self._next - 1) % self.capacity
+        return self.timestamps[index], self.cpu[index], self.memory[index]
+
+    def get_samples(self, since=None):
+        """
+        Returns the samples oldest first as three arrays (timestamps, cpu, memory), optionally only those
+        taken at or after the `since` timestamp.
+        """
+        start = (self._next - self.count) % self.capacity
+        order = [(start + offset) % self.capacity for offset in range(self.count)]
+        if since is not None:
+            order = [index for index in order if self.timestamps[index] >= since]
+        return (array('d', (self.timestamps[index] for index in order)),
+                array('d', (self.cpu[index] for index in order)),
+                array('d', (self.memory[index] for index in order)))
+
+
+class MetricsSampler:
+    """
+    Background service that polls a set of hosts every `interval` seconds with the collectors in
+    cpu_memory_process (the /proc snapshot for Linux, the CIM snapshot for Windows) and keeps the recent
+    samples of every host in a MetricRingBuffer. The hosts of one round are polled concurrently on the remote
+    execution engine. The latest full snapshot, including the top processes, is kept next to the buffer.
+    """
+
+    def __init__(self, interval=METRICS_SAMPLER_INTERVAL, capacity=METRICS_SAMPLER_CAPACITY):
+        self.interval = interval
+        self.capacity = capacity
+        self._hosts = {}
+        self._buffers = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_hosts(self, hosts, is_linux=False):
+        """
+        Adds hosts to the polling set.
+        Args:
+            hosts (list): Host names, or device_config style dictionaries with 'hostName' and optionally 'isLinux'.
+            is_linux (bool): The OS assumed for entries without their own 'isLinux' flag.
+        """
+        from fleet_helper import get_fleet_hosts
+        with self._lock:
+            for host_name, host_is_linux in get_fleet_hosts(hosts, is_linux):
+                self._hosts[host_name] = host_is_linux
+                if host_name not in self._buffers:
+                    self._buffers[host_name] = MetricRingBuffer(self.capacity)
+
+    def remove_host(self, host_name):
+        """
+        Stops polling a host and drops its history.
+        """
+        with self._lock:
+            self._hosts.pop(host_name, None)
+            self._buffers.pop(host_name, None)
+            self._snapshots.pop(host_name, None)
+
+    def start(self):
+        """
+        Starts the polling thread if it is not running yet.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """
+        Stops the polling thread after the current round.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll_once(self):
+        """
+        Samples every host once and records the results.
+        """
+        from async_remote_helper import remote_execution_engine
+        from cpu_memory_process import get_linux_metrics_snapshot, get_windows_metrics_snapshot
+        with self._lock:
+            hosts = list(self._hosts.items())
+        futures = {}
+        for host_name, is_linux in hosts:
+            collector = get_linux_metrics_snapshot if is_linux else get_windows_metrics_snapshot
+            futures[host_name] = remote_execution_engine.submit(host_name, collector, host_name)
+        for host_name, future in futures.items():
+            try:
+                snapshot = future.result()
+            except Exception as exception:
+                print(exception)
+                snapshot = None
+            if snapshot is not None:
+                self.record(host_name, snapshot)
+
+    def record(self, host_name, snapshot, timestamp=None):
+        """
+        Stores a collector snapshot for a host, e.g. one taken by a live probe outside of the sampler.
+        Only hosts in the polling set are recorded.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            buffer = self._buffers.get(host_name)
+            if buffer is not None:
+                buffer.append(timestamp, snapshot["cpu_usage"], snapshot["memory_usage"])
+                self._snapshots[host_name] = (timestamp, snapshot)
+
+    def get_latest(self, host_name, max_age=METRICS_SAMPLER_MAX_AGE):
+        """
+        Returns the newest snapshot of a host if it is at most `max_age` seconds old.
+        Returns:dict or None: {"timestamp", "cpu_usage", "memory_usage", "top_cpu_process", "top_memory_process"}.
+        """
+        with self._lock:
+            entry = self._snapshots.get(host_name)
+        if entry is None or time.time() - entry[0] > max_age:
+            return None
+        return dict(entry[1], timestamp=entry[0])
+
+    def get_samples(self, host_name, since=None):
+        """
+        Returns the buffered history of a host as (timestamps, cpu, memory) arrays, oldest first, or None for
+        hosts that are not sampled.
+        """
+        with self._lock:
+            buffer = self._buffers.get(host_name)
+            return buffer.get_samples(since) if buffer is not None else None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started_at = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as exception:
+                print(exception)
+            self._stop_event.wait(max(0, self.interval - (time.monotonic() - started_at)))
+
+
+metrics_sampler = MetricsSampler()
+
+
+def parse_sampler_hosts(host_text):
+    """
+    Parses METRICS_SAMPLER_HOSTS ("host1:linux,host2") into device_config style dictionaries.
+    """
+    hosts = []
+    for entry in host_text.split(','):
+        host_name, _, os_name = entry.strip().partition(':')
+        if host_name:
+            hosts.append({"hostName": host_name, "isLinux": os_name.strip().lower() == 'linux'})
+    return hosts
+
+
+def start_metrics_sampler(hosts=None, is_linux=False):
+    """
+    Starts the background sampler for the given hosts (default: METRICS_SAMPLER_HOSTS).
+    Args:
+        hosts (list): Host names, or device_config style dictionaries with 'hostName' and optionally 'isLinux'.
+        is_linux (bool): The OS assumed for entries without their own 'isLinux' flag.
+    """
+    metrics_sampler.add_hosts(hosts if hosts is not None else parse_sampler_hosts(METRICS_SAMPLER_HOSTS), is_linux)
+    metrics_sampler.start()
+
+
+def init_metrics_sampler():
+    """
+    Starts the sampler for METRICS_SAMPLER_HOSTS when METRICS_SAMPLER_ENABLED is set. Meant to be called
+    once from the worker entry point, after the worker process has been forked, so that only the processes
+    that serve remediations poll the devices.
+    Returns:bool: True if the sampler is running.
+    """
+    if METRICS_SAMPLER_ENABLED:
+        start_metrics_sampler()
+    return metrics_sampler.is_running()
+
+
+def get_fresh_metric(host_name, alert_type, max_age=METRICS_SAMPLER_MAX_AGE):
+    """
+    Returns the sampled CPU or memory usage of a host when the sampler has a sample that is fresh enough.
+    Args:
+        host_name (str): The host name or IP address.
+        alert_type (str): 'CPU' or 'MEMORY'.
+        max_age (float): The maximum age of the sample in seconds.
+    Returns:str or None: The usage percentage as a string, or None if there is no fresh sample.
+    """
+    snapshot = metrics_sampler.get_latest(host_name, max_age)
+    if snapshot is None or alert_type not in ('CPU', 'MEMORY'):
+        return None
+    return str(snapshot["cpu_usage"] if alert_type == 'CPU' else snapshot["memory_usage"])
+
+
+def get_fresh_top_process(host_name, alert_type, max_age=METRICS_SAMPLER_MAX_AGE):
+    """
+    Returns the top CPU or memory consuming processes from a fresh sampler snapshot as ProcessSample entries, or None.
+    """
+    snapshot = metrics_sampler.get_latest(host_name, max_age)
+    if snapshot is None or alert_type not in ('CPU', 'MEMORY'):
+        return None
+    return snapshot["top_cpu_process"] if alert_type == 'CPU' else snapshot["top_memory_process"]
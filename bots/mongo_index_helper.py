@@ -0,0 +1,173 @@
+import os
+import threading
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+# create the registered indexes once per process, when the shared MongoClient is first created
+MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'false').lower() == 'true'
+# explain every registered query shape at the same time and report collection scans
+MONGO_EXPLAIN_QUERIES = os.getenv('MONGO_EXPLAIN_QUERIES', 'false').lower() == 'true'
+
+# The query shapes the helpers send to the automation collections: the index keys that serve each one and
+# a sample filter of the same shape for explain(). Shapes served by the built-in _id index have no keys.
+QUERY_SHAPES = {
+    "config_by_key": {"collection": "automation_airflow_config", "keys": [("key", 1)],
+                      "filter": {"key": "CPUMemoryResourceRemediation"}},
+    "config_by_tenant_key": {"collection": "automation_airflow_config", "keys": [("tenantId", 1), ("key", 1)],
+                             "filter": {"tenantId": "6735248edb0aefa5f65131b0", "key": "CPUMemoryResourceRemediation"}},
+    "workflow_connection_by_conn_id": {"collection": "automation_workflow_connection", "keys": [("connId", 1)],
+                                       "filter": {"connId": ""}},
+    "workflow_monitoring_by_conn_id": {"collection": "automation_workflow_monitoring", "keys": [("connId", 1)],
+                                       "filter": {"connId": ""}},
+    "incident_configuration_by_workflow": {"collection": "automation_incident_configuration", "keys": [("workflowName", 1)],
+                                           "filter": {"workflowName": ""}},
+    "va_configuration_by_title": {"collection": "automation_va_configuration", "keys": [("vaTitle", 1)],
+                                  "filter": {"vaTitle": "", "osVersion": {"$regex": "", "$options": "i"}}},
+    "va_transaction_by_id_status": {"collection": "automation_va_transaction", "keys": None,
+                                    "filter": {"_id": "000000000000000000000000", "status": "New"}}
+}
+
+_startup_lock = threading.Lock()
+_startup_pid = None
+
+
+def register_query_shape(name, collection_name, keys, sample_filter, unique=False):
+    """
+    Adds a query shape to the registry (or replaces one with the same name).
+    Args:
+        name (str): The shape name; it is also the name of the index created for it.
+        collection_name (str): The collection the query runs against.
+        keys (list): (field, direction) pairs of the index serving the query, or None if _id serves it.
+        sample_filter (dict): A filter of the same shape, used by explain_query_shapes.
+        unique (bool): Whether the index is unique.
+    """
+    QUERY_SHAPES[name] = {"collection": collection_name, "keys": keys, "filter": sample_filter, "unique": unique}
+
+
+def get_sample_filter(shape):
+    """
+    Returns the shape's sample filter with an "_id" string converted to an ObjectId, as the helpers query it.
+    """
+    from bson import ObjectId
+    sample_filter = dict(shape["filter"])
+    if isinstance(sample_filter.get("_id"), str):
+        sample_filter["_id"] = ObjectId(sample_filter["_id"])
+    return sample_filter
+
+
+def ensure_indexes(names=None):
+    """
+    Creates the indexes of the registered query shapes. It is idempotent: an index with the same keys that
+    already exists (under any name) is left alone.
+    Args:names (list, optional): The shapes to index; all of them by default.
+    Returns:dict: {shape name: "Created"/"Exists"/"Not Required"/"Failure"}.
+    """
+    from zif_mongo_helper import get_collection
+    result = {}
+    for name in names or list(QUERY_SHAPES):
+        shape = QUERY_SHAPES[name]
+        if not shape["keys"]:
+            result[name] = "Not Required"
+            continue
+        try:
+            collection = get_collection(shape["collection"])
+            keys = [tuple(key) for key in shape["keys"]]
+            if keys in [[tuple(key) for key in index["key"]] for index in collection.index_information().values()]:
+                result[name] = "Exists"
+            else:
+                collection.create_index(keys, name=name, unique=shape.get("unique", False))
+                result[name] = "Created"
+                print(f"Created index {name} on {shape['collection']}")
+        except Exception as exception:
+            print(f"Error creating index {name}: {exception}")
+            result[name] = "Failure"
+    return result
+
+
+def get_plan_stages(plan):
+    """
+    Returns the stage names of an explain() plan tree, from the root down.
+    """
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop(0)
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        # classic plans nest inputStage/inputStages, slot based engine plans wrap them in queryPlan
+        for child_key in ("queryPlan", "inputStage", "inputStages", "shards"):
+            child = node.get(child_key)
+            if isinstance(child, list):
+                pending.extend(child)
+            elif child is not None:
+                pending.append(child)
+        if "winningPlan" in node:
+            pending.append(node["winningPlan"])
+    return stages
+
+
+def explain_query_shapes(names=None):
+    """
+    Runs explain() for the sample filter of every registered query shape and reports how MongoDB answers it.
+    A shape whose winning plan contains a COLLSCAN stage is flagged and printed, since its latency grows with
+    the collection.
+    Args:names (list, optional): The shapes to explain; all of them by default.
+    Returns:
+        dict: {shape name: {"collection", "stages", "collscan": bool, "index": index name or None,
+        "keys_examined", "docs_examined"}}, or {"error": message} for shapes that could not be explained.
+    """
+    from zif_mongo_helper import get_collection
+    report = {}
+    for name in names or list(QUERY_SHAPES):
+        shape = QUERY_SHAPES[name]
+        try:
+            explanation = get_collection(shape["collection"]).find(get_sample_filter(shape)).explain()
+            query_planner = explanation.get("queryPlanner", {})
+            stages = get_plan_stages(query_planner.get("winningPlan", {}))
+            execution_stats = explanation.get("executionStats", {})
+            index_names = []
+            pending = [query_planner.get("winningPlan", {})]
+            while pending:
+                node = pending.pop()
+                if isinstance(node, dict):
+                    if node.get("indexName"):
+                        index_names.append(node["indexName"])
+                    pending.extend(value for value in node.values() if isinstance(value, (dict, list)))
+                elif isinstance(node, list):
+                    pending.extend(node)
+            report[name] = {
+                "collection": shape["collection"],
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages,
+                "index": index_names[0] if index_names else ("_id_" if "IDHACK" in stages or "EXPRESS_IXSCAN" in stages else None),
+                "keys_examined": execution_stats.get("totalKeysExamined"),
+                "docs_examined": execution_stats.get("totalDocsExamined")
+            }
+            if report[name]["collscan"]:
+                print(f"Query shape {name} on {shape['collection']} is answered by a collection scan")
+        except Exception as exception:
+            print(f"Error explaining query shape {name}: {exception}")
+            report[name] = {"error": str(exception)}
+    return report
+
+
+def run_startup_checks():
+    """
+    Ensures the indexes (MONGO_ENSURE_INDEXES) and explains the query shapes (MONGO_EXPLAIN_QUERIES) once per
+    process. zif_mongo_helper calls it after creating the shared MongoClient.
+    """
+    global _startup_pid
+    if not (MONGO_ENSURE_INDEXES or MONGO_EXPLAIN_QUERIES):
+        return
+    with _startup_lock:
+        if _startup_pid == os.getpid():
+            return
+        _startup_pid = os.getpid()
+    if MONGO_ENSURE_INDEXES:
+        ensure_indexes()
+    if MONGO_EXPLAIN_QUERIES:
+        explain_query_shapes()
@@ -0,0 +1,264 @@
+import os
+import re
+import time
+import select
+import socket
+import struct
+import platform
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+ICMP_PAYLOAD = b'botGen-ping'.ljust(56, b'\x00')
+PING_TIMEOUT = float(os.getenv('PING_TIMEOUT', 3))
+PING_PACKET_INTERVAL = float(os.getenv('PING_PACKET_INTERVAL', 0.2))
+PING_SUBPROCESS_WORKERS = int(os.getenv('PING_SUBPROCESS_WORKERS', 32))
+MAX_ICMP_SEQUENCE = 0xFFFF
+_sweep_identifiers = itertools.count(os.getpid() & 0xFFFF)
+
+
+def get_icmp_checksum(data):
+    """
+    Computes the RFC 1071 internet checksum of an ICMP message.
+    """
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(identifier, sequence):
+    """
+    Builds an ICMP echo request with the given identifier and sequence number.
+    """
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = get_icmp_checksum(header + ICMP_PAYLOAD)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + ICMP_PAYLOAD
+
+
+def parse_echo_reply(packet):
+    """
+    Extracts (identifier, sequence) from a received ICMP echo reply.
+    Raw sockets (and datagram sockets on some platforms) deliver the IPv4 header in front of the ICMP
+    message, so it is skipped when present.
+    Returns:tuple or None: (identifier, sequence), or None if the packet is not an echo reply.
+    """
+    if packet and packet[0] >> 4 == 4:
+        packet = packet[(packet[0] & 0x0F) * 4:]
+    if len(packet) < 8:
+        return None
+    icmp_type, code, checksum, identifier, sequence = struct.unpack('!BBHHH', packet[:8])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return identifier, sequence
+
+
+def open_icmp_socket():
+    """
+    Opens a non-blocking ICMP socket, preferring unprivileged datagram ICMP over a raw socket.
+    Returns:
+        tuple: (socket, is_raw), or (None, None) if the process may open neither kind of socket.
+    """
+    for socket_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            icmp_socket = socket.socket(socket.AF_INET, socket_type, socket.IPPROTO_ICMP)
+            icmp_socket.setblocking(False)
+            return icmp_socket, socket_type == socket.SOCK_RAW
+        except OSError:
+            continue
+    return None, None
+
+
+def get_empty_ping_result(host, count):
+    """
+    Returns the per-host result record with no replies recorded.
+    """
+    return {"host": host, "ip": None, "sent": 0, "received": 0, "packet_loss": 100.0, "count": count,
+            "rtt_min": None, "rtt_avg": None, "rtt_max": None, "rtts": [], "success": False, "error": None, "output": None}
+
+
+def set_ping_statistics(ping_result):
+    """
+    Fills packet loss, RTT min/avg/max (ms) and the success flag from the recorded RTTs.
+    """
+    rtts = ping_result["rtts"]
+    ping_result["received"] = len(rtts)
+    if ping_result["sent"]:
+        ping_result["packet_loss"] = round(100.0 * (ping_result["sent"] - len(rtts)) / ping_result["sent"], 1)
+    if rtts:
+        ping_result["rtt_min"] = round(min(rtts), 3)
+        ping_result["rtt_avg"] = round(sum(rtts) / len(rtts), 3)
+        ping_result["rtt_max"] = round(max(rtts), 3)
+    ping_result["success"] = len(rtts) > 0
+    return ping_result
+
+
+def sweep_icmp(targets, icmp_socket, is_raw, count, timeout, interval, stop_on_first_reply):
+    """
+    Sends `count` echo requests to every target address over one socket and collects the replies.
+    Requests to all addresses of a round go out back to back, so the sweep takes roughly
+    (count - 1) * interval + timeout seconds regardless of the number of hosts.
+    Args:
+        targets (dict): {ip_address: ping result record} to fill in.
+        icmp_socket (socket.socket): The socket returned by open_icmp_socket.
+        is_raw (bool): Whether the socket is a raw socket (replies to other processes must be filtered by identifier).
+        count (int): Echo requests per address.
+        timeout (float): Seconds to wait for replies after the last request was sent.
+        interval (float): Seconds between rounds.
+        stop_on_first_reply (bool): Stop sending to an address once it has answered.
+    """
+    identifier = next(_sweep_identifiers) & 0xFFFF
+    sequences = itertools.count()
+    pending = {}
+
+    def receive(wait_until):
+        while True:
+            remaining = wait_until - time.monotonic()
+            if remaining <= 0 or not pending:
+                return
+            readable, _, _ = select.select([icmp_socket], [], [], remaining)
+            if not readable:
+                return
+            while True:
+                try:
+                    packet, address = icmp_socket.recvfrom(2048)
+                except (BlockingIOError, InterruptedError):
+                    break
+                reply = parse_echo_reply(packet)
+                if reply is None or (is_raw and reply[0] != identifier):
+                    continue
+                sent_at = pending.pop((address[0], reply[1]), None)
+                if sent_at is not None:
+                    targets[address[0]]["rtts"].append((time.monotonic() - sent_at) * 1000.0)
+
+    for round_index in range(count):
+        for ip_address, ping_result in targets.items():
+            if ping_result["error"] or (stop_on_first_reply and ping_result["rtts"]):
+                continue
+            sequence = next(sequences) & MAX_ICMP_SEQUENCE
+            try:
+                icmp_socket.sendto(build_echo_request(identifier, sequence), (ip_address, 0))
+            except BlockingIOError:
+                select.select([], [icmp_socket], [], interval or 0.05)
+                continue
+            except OSError as exception:
+                ping_result["error"] = exception.strerror or str(exception)
+                continue
+            pending[(ip_address, sequence)] = time.monotonic()
+            ping_result["sent"] += 1
+        if round_index < count - 1:
+            receive(time.monotonic() + interval)
+    receive(time.monotonic() + timeout)
+
+
+def get_subprocess_ping_result(host, count, timeout):
+    """
+    Pings one host with the system ping command, used when no ICMP socket can be opened.
+    Returns:dict: A ping result record with the statistics parsed from the ping output.
+    """
+    ping_result = get_empty_ping_result(host, count)
+    if platform.system().lower() == 'windows':
+        command = ['ping', '-n', str(count), '-w', str(int(timeout * 1000)), host]
+    else:
+        command = ['ping', '-c', str(count), '-W', str(max(1, int(timeout))), host]
+    try:
+        response = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  timeout=count * (timeout + 1) + 1)
+        ping_result["output"] = response.stdout.decode(errors='replace')
+        ping_result["success"] = response.returncode == 0
+        counts = re.search(r'(\d+) packets transmitted, (\d+) (?:packets )?received', ping_result["output"])
+        if counts:
+            ping_result["sent"], ping_result["received"] = int(counts.group(1)), int(counts.group(2))
+        else:
+            counts = re.search(r'Sent = (\d+), Received = (\d+)', ping_result["output"])
+            if counts:
+                ping_result["sent"], ping_result["received"] = int(counts.group(1)), int(counts.group(2))
+        if ping_result["sent"]:
+            ping_result["packet_loss"] = round(100.0 * (ping_result["sent"] - ping_result["received"]) / ping_result["sent"], 1)
+        rtt = re.search(r'= ([\d.]+)/([\d.]+)/([\d.]+)', ping_result["output"])
+        if rtt:
+            ping_result["rtt_min"], ping_result["rtt_avg"], ping_result["rtt_max"] = (float(value) for value in rtt.groups())
+        if not ping_result["output"].strip():
+            ping_result["error"] = response.stderr.decode(errors='replace').strip() or None
+    except Exception as exception:
+        ping_result["error"] = str(exception)
+    return ping_result
+
+
+def ping_hosts(hosts, count=1, timeout=PING_TIMEOUT, interval=PING_PACKET_INTERVAL, stop_on_first_reply=False):
+    """
+    Pings many hosts at once and returns per-host reachability and RTT statistics.
+    All hosts are swept together over a single ICMP socket (unprivileged datagram ICMP where the kernel allows
+    it, raw ICMP otherwise). If neither socket can be opened the system ping command is run for every host
+    in parallel instead.
+    Args:
+        hosts (list): Host names or IPv4 addresses.
+        count (int): Echo requests per host.
+        timeout (float): Seconds to wait for replies after the last request.
+        interval (float): Seconds between successive requests to the same host.
+        stop_on_first_reply (bool): Stop pinging a host as soon as it has answered once.
+    Returns:
+        dict: {host: result} where result holds 'ip', 'sent', 'received', 'packet_loss' (%), 'rtt_min',
+        'rtt_avg', 'rtt_max' (ms), 'success' (at least one reply) and 'error'.
+    """
+    count = max(1, int(count))
+    hosts = [str(host) for host in hosts if host]
+    results = {host: get_empty_ping_result(host, count) for host in hosts}
+    icmp_socket, is_raw = open_icmp_socket()
+    if icmp_socket is None:
+        with ThreadPoolExecutor(max_workers=max(1, min(PING_SUBPROCESS_WORKERS, len(hosts)))) as executor:
+            for host, ping_result in zip(hosts, executor.map(lambda host: get_subprocess_ping_result(host, count, timeout), hosts)):
+                results[host] = ping_result
+        return results
+    try:
+        addresses = {}
+        for host in hosts:
+            try:
+                ip_address = socket.gethostbyname(host)
+                results[host]["ip"] = ip_address
+                addresses.setdefault(ip_address, []).append(host)
+            except (socket.gaierror, UnicodeError):
+                results[host]["error"] = "Name or service not known"
+        targets = {ip_address: get_empty_ping_result(ip_address, count) for ip_address in addresses}
+        batch_size = max(1, (MAX_ICMP_SEQUENCE + 1) // count)
+        ip_addresses = list(targets)
+        for batch_start in range(0, len(ip_addresses), batch_size):
+            batch = {ip_address: targets[ip_address] for ip_address in ip_addresses[batch_start:batch_start + batch_size]}
+            sweep_icmp(batch, icmp_socket, is_raw, count, timeout, interval, stop_on_first_reply)
+        for ip_address, target in targets.items():
+            set_ping_statistics(target)
+            for host in addresses[ip_address]:
+                results[host].update({key: value for key, value in target.items() if key not in ("host", "ip")})
+    finally:
+        icmp_socket.close()
+    return results
+
+
+def format_ping_output(ping_result):
+    """
+    Renders a ping result record as the summary text printed by the Linux ping command.
+    Records produced by the subprocess fallback already carry the command output and are returned as is.
+    """
+    host = ping_result["host"]
+    if ping_result.get("output"):
+        return ping_result["output"]
+    if ping_result["ip"] is None:
+        return f"ping:{host}: {ping_result['error'] or 'Name or service not known'}"
+    lines = [f"PING {host} ({ping_result['ip']}) {len(ICMP_PAYLOAD)}({len(ICMP_PAYLOAD) + 28}) bytes of data."]
+    for sequence, rtt in enumerate(ping_result["rtts"], start=1):
+        lines.append(f"{len(ICMP_PAYLOAD) + 8} bytes from {ping_result['ip']}: icmp_seq={sequence} time={rtt:.2f} ms")
+    lines.append("")
+    lines.append(f"--- {host} ping statistics ---")
+    packet_loss = ping_result['packet_loss']
+    lines.append(f"{ping_result['sent']} packets transmitted, {ping_result['received']} received, {packet_loss:g}% packet loss")
+    if ping_result["received"]:
+        lines.append(f"rtt min/avg/max = {ping_result['rtt_min']:.3f}/{ping_result['rtt_avg']:.3f}/{ping_result['rtt_max']:.3f} ms")
+    return "\n".join(lines) + "\n"
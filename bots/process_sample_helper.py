@@ -0,0 +1,109 @@
+import heapq
+
+CPU = 'CPU'
+MEMORY = 'MEMORY'
+USAGE_KEYS = {CPU: "CPU USAGE IN %", MEMORY: "MEMORY USAGE IN %"}
+
+
+class ProcessSample:
+    """
+    One process as seen by a collector: the PID, the command and its CPU and memory usage as percentages of
+    the whole machine. Usage a collector did not measure is None. The collectors in cpu_memory_process all
+    return these, so sorting and merging are plain float comparisons; the PID|||Name strings and the
+    "CPU USAGE IN %" dictionaries are only produced by the format_* functions when a result is displayed.
+    """
+    __slots__ = ('pid', 'command', 'cpu_usage', 'memory_usage')
+
+    def __init__(self, pid, command, cpu_usage=None, memory_usage=None):
+        self.pid = int(pid)
+        self.command = command
+        self.cpu_usage = None if cpu_usage is None else float(cpu_usage)
+        self.memory_usage = None if memory_usage is None else float(memory_usage)
+
+    def get_usage(self, alert_type=None):
+        """
+        Returns the CPU or memory usage; without an alert type the CPU usage, or the memory usage if only that is known.
+        """
+        if alert_type == MEMORY or (alert_type is None and self.cpu_usage is None):
+            return self.memory_usage
+        return self.cpu_usage
+
+    def to_dict(self, alert_type=None):
+        """
+        Returns the sample in the layout of get_top_cpu_consuming_process: {"PID", "COMMAND", "CPU USAGE IN %": "12.5%"}.
+        """
+        if alert_type is None:
+            alert_type = CPU if self.cpu_usage is not None else MEMORY
+        return {"PID": str(self.pid), "COMMAND": self.command, USAGE_KEYS[alert_type]: f"{round(self.get_usage(alert_type) or 0.0, 2)}%"}
+
+    def to_row(self, alert_type=None):
+        """
+        Returns the sample in the layout of get_top_cpu_process: "PID|||Name|||12.50 %".
+        """
+        return f"{self.pid}|||{self.command}|||{self.get_usage(alert_type) or 0.0:.2f} %"
+
+    def __repr__(self):
+        return f"ProcessSample(pid={self.pid}, command={self.command!r}, cpu_usage={self.cpu_usage}, memory_usage={self.memory_usage})"
+
+
+def parse_percent(usage_text):
+    """
+    Converts a formatted usage such as "12.5%", "12.50 %" or "12,50 %~~~" into a float.
+    Returns:float or None: The usage, or None if it is not a number.
+    """
+    try:
+        return float(str(usage_text).replace('~~~', '').replace('%', '').replace(',', '.').strip())
+    except ValueError:
+        return None
+
+
+def parse_process_rows(result, alert_type=CPU):
+    """
+    Parses the "PID|||Name|||12.34 %" rows printed by the Windows Get-Counter scripts (rows may be separated by
+    newlines or "~~~") into samples; malformed rows are skipped.
+    """
+    samples = []
+    for row in str(result or '').replace('~~~', '\n').splitlines():
+        fields = row.strip().split('|||')
+        usage = parse_percent(fields[-1]) if len(fields) == 3 else None
+        if usage is None or not fields[0].strip().isdigit():
+            continue
+        if alert_type == MEMORY:
+            samples.append(ProcessSample(fields[0], fields[1], memory_usage=usage))
+        else:
+            samples.append(ProcessSample(fields[0], fields[1], cpu_usage=usage))
+    return samples
+
+
+def get_top_samples(samples, count, alert_type=CPU):
+    """
+    Returns the `count` samples with the highest CPU or memory usage, highest first.
+    """
+    return heapq.nlargest(count, [sample for sample in samples if sample.get_usage(alert_type) is not None],
+                          key=lambda sample: sample.get_usage(alert_type))
+
+
+def format_process_dicts(samples, alert_type=CPU):
+    """
+    Formats samples as the list of dictionaries returned for Linux hosts.
+    """
+    return [sample.to_dict(alert_type) for sample in samples]
+
+
+def format_process_rows(samples, alert_type=CPU):
+    """
+    Formats samples as the text returned by get_top_cpu_process / get_top_memory_process for Windows hosts
+    (memory rows keep their "~~~" terminator).
+    """
+    suffix = '~~~' if alert_type == MEMORY else ''
+    return "\n".join(sample.to_row(alert_type) + suffix for sample in samples)
+
+
+def format_process_samples(samples, alert_type, is_linux):
+    """
+    Formats samples for display in the layout of the host's OS: dictionaries for Linux, PID|||Name rows for Windows.
+    Returns None when there are no samples for a Windows host (or no sample list at all), like the collectors.
+    """
+    if samples is None or (not samples and not is_linux):
+        return None
+    return format_process_dicts(samples, alert_type) if is_linux else format_process_rows(samples, alert_type)
@@ -0,0 +1,165 @@
+import os
+import time
+import atexit
+import threading
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+WINRM_USE_PSRP = os.getenv('WINRM_USE_PSRP', 'false').lower() == 'true'
+PSRP_IDLE_TIMEOUT = int(os.getenv('PSRP_IDLE_TIMEOUT', 600))
+PSRP_RECYCLE_AFTER = int(os.getenv('PSRP_RECYCLE_AFTER', 500))
+PSRP_OPERATION_TIMEOUT = int(os.getenv('PSRP_OPERATION_TIMEOUT', 20))
+
+
+def is_psrp_available():
+    """
+    Returns True if the optional pypsrp package is installed.
+    """
+    try:
+        import pypsrp
+        return True
+    except ImportError:
+        return False
+
+
+class PsrpRunspaceManager:
+    """
+    Keeps one open PowerShell runspace pool per Windows host over WS-Management/PSRP.
+    run_ps in pywinrm starts a new powershell.exe on the target for every command. Here scripts run inside a
+    runspace that stays open between calls, so process start-up and module loading (WebAdministration,
+    SmbShare, ...) are paid once per host. Every host has its own single-runspace pool and lock, so commands
+    to the same host always land in the same runspace. The pool is recycled after an error, after
+    `recycle_after` scripts and after `idle_timeout` seconds without use; all pools are closed at exit.
+    """
+
+    def __init__(self, idle_timeout=PSRP_IDLE_TIMEOUT, recycle_after=PSRP_RECYCLE_AFTER):
+        self.idle_timeout = idle_timeout
+        self.recycle_after = recycle_after
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def run_script(self, host_name, command_text, is_ntlm=True, modules=None):
+        """
+        Runs a PowerShell script in the host's persistent runspace and returns its output as text.
+        Args:
+            host_name (str): The IP address or host name of the remote Windows machine.
+            command_text (str): The PowerShell script to execute. It runs in a local scope, so variables do not
+                leak into later scripts.
+            is_ntlm (bool): If True, NTLM authentication is used, otherwise basic authentication.
+            modules (list): Optional module names imported into the runspace once, before the first script that needs them.
+        Returns:
+            str: The script output formatted like the console (Out-String).
+        Raises:
+            Exception: Transport or runspace errors, after the runspace has been discarded.
+        """
+        from pypsrp.powershell import PowerShell
+        from pypsrp.complex_objects import PSInvocationState
+        entry = self._get_entry(host_name, is_ntlm)
+        with entry["lock"]:
+            try:
+                if entry["pool"] is None:
+                    entry["pool"] = self._open_pool(host_name, is_ntlm)
+                    entry["modules"] = set()
+                    entry["invocations"] = 0
+                for module in modules or []:
+                    if module not in entry["modules"]:
+                        powershell = PowerShell(entry["pool"])
+                        powershell.add_cmdlet('Import-Module').add_parameter('Name', module)
+                        powershell.invoke()
+                        entry["modules"].add(module)
+                powershell = PowerShell(entry["pool"])
+                powershell.add_script(command_text, use_local_scope=True)
+                powershell.add_cmdlet('Out-String')
+                output = powershell.invoke()
+                entry["invocations"] += 1
+                entry["last_used"] = time.monotonic()
+                if powershell.state == PSInvocationState.FAILED or entry["invocations"] >= self.recycle_after:
+                    self._close_pool(entry)
+                return "".join(str(item) for item in output if item is not None)
+            except Exception:
+                self._close_pool(entry)
+                raise
+
+    def close_host(self, host_name):
+        """
+        Closes the runspace pools held for a host.
+        """
+        with self._lock:
+            entries = [self._entries.pop(key) for key in list(self._entries) if key[0] == host_name]
+        for entry in entries:
+            with entry["lock"]:
+                self._close_pool(entry)
+
+    def close_all(self):
+        """
+        Closes every runspace pool.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries = {}
+        for entry in entries:
+            with entry["lock"]:
+                self._close_pool(entry)
+
+    def _get_entry(self, host_name, is_ntlm):
+        key = (host_name, bool(is_ntlm))
+        now = time.monotonic()
+        with self._lock:
+            for idle_key in list(self._entries):
+                idle_entry = self._entries[idle_key]
+                if idle_key != key and now - idle_entry["last_used"] > self.idle_timeout and idle_entry["lock"].acquire(blocking=False):
+                    try:
+                        self._close_pool(idle_entry)
+                        del self._entries[idle_key]
+                    finally:
+                        idle_entry["lock"].release()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {"pool": None, "lock": threading.Lock(), "modules": set(),
+                                              "invocations": 0, "last_used": now}
+        return entry
+
+    @staticmethod
+    def _open_pool(host_name, is_ntlm):
+        from pypsrp.wsman import WSMan
+        from pypsrp.powershell import RunspacePool
+        wsman = WSMan(host_name, username=os.environ['USER_NAME_WINDOWS'], password=os.environ['PASSWORD_WINDOWS'],
+                      ssl=False, auth='ntlm' if is_ntlm else 'basic', encryption='auto' if is_ntlm else 'never',
+                      cert_validation=False, operation_timeout=PSRP_OPERATION_TIMEOUT)
+        pool = RunspacePool(wsman, min_runspaces=1, max_runspaces=1)
+        pool.open()
+        return pool
+
+    @staticmethod
+    def _close_pool(entry):
+        pool, entry["pool"] = entry["pool"], None
+        if pool is not None:
+            try:
+                pool.close()
+            except Exception as exception:
+                print(exception)
+
+
+psrp_runspace_manager = PsrpRunspaceManager()
+atexit.register(psrp_runspace_manager.close_all)
+
+
+def get_psrp_script_result(host_name, command_text, is_ntlm=True, modules=None):
+    """
+    Executes a PowerShell script in the host's persistent runspace and returns the output.
+    Args:
+        host_name (str): The IP address or host name of the remote Windows machine.
+        command_text (str): The PowerShell script to execute.
+        is_ntlm (bool): If True, NTLM authentication is used.
+        modules (list): Optional module names to keep imported in the runspace.
+    Returns:
+        str: The script's output if successfull, else None if an error occurs.
+    """
+    result = None
+    try:
+        result = psrp_runspace_manager.run_script(host_name, command_text, is_ntlm, modules)
+    except Exception as exception:
+        print(exception)
+    return result
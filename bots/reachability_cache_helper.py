@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+REACHABILITY_SUCCESS_TTL = float(os.getenv('REACHABILITY_SUCCESS_TTL', 120))
+REACHABILITY_FAILURE_TTL = float(os.getenv('REACHABILITY_FAILURE_TTL', 60))
+REACHABILITY_CACHE_MAX_ENTRIES = int(os.getenv('REACHABILITY_CACHE_MAX_ENTRIES', 20000))
+PING = 'ping'
+WINRM = 'winrm'
+SSH = 'ssh'
+
+
+class ReachabilityCache:
+    """
+    In-process cache of host reachability keyed by host and protocol ('ping', 'winrm' or 'ssh').
+    Successes and failures expire after separate TTLs, so a host that was just found down fails fast for
+    `failure_ttl` seconds instead of going through ping and a connect timeout again. Besides the explicit
+    probes, every real WinRM/SSH command records its outcome here.
+    """
+
+    def __init__(self, success_ttl=REACHABILITY_SUCCESS_TTL, failure_ttl=REACHABILITY_FAILURE_TTL,
+                 max_entries=REACHABILITY_CACHE_MAX_ENTRIES):
+        self.success_ttl = success_ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_status(self, host_name, protocol):
+        """
+        Returns the cached status for the host and protocol.
+        Args:
+            host_name (str): The IP address or host name.
+            protocol (str): 'ping', 'winrm' or 'ssh'.
+        Returns:str or None: "Success" or "Failure" while the entry is fresh, otherwise None.
+        """
+        key = (str(host_name).lower(), protocol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            return "Success" if entry[0] else "Failure"
+
+    def record(self, host_name, protocol, reachable):
+        """
+        Stores the outcome of a probe or of a real command for the host and protocol.
+        A successful WinRM or SSH command also proves the host answers ping-level traffic, so it refreshes
+        the 'ping' entry as well.
+        """
+        if not host_name:
+            return
+        now = time.monotonic()
+        expires_at = now + (self.success_ttl if reachable else self.failure_ttl)
+        host_key = str(host_name).lower()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge_expired(now)
+            self._entries[(host_key, protocol)] = (bool(reachable), expires_at)
+            if reachable and protocol != PING:
+                self._entries[(host_key, PING)] = (True, expires_at)
+
+    def invalidate(self, host_name, protocol=None):
+        """
+        Drops the cached entries for a host (all protocols unless one is given), e.g. before a reboot.
+        """
+        host_key = str(host_name).lower()
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == host_key and protocol in (None, key[1]):
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Drops every cached entry.
+        """
+        with self._lock:
+            self._entries = {}
+
+    def _purge_expired(self, now):
+        for key in [key for key, entry in self._entries.items() if entry[1] < now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            for key in sorted(self._entries, key=lambda key: self._entries[key][1])[:len(self._entries) // 10 + 1]:
+                del self._entries[key]
+
+
+reachability_cache = ReachabilityCache()
+
+
+def get_cached_reachability(host_name, protocol):
+    """
+    Returns "Success", "Failure" or None (unknown or expired) for the host and protocol.
+    """
+    return reachability_cache.get_status(host_name, protocol)
+
+
+def record_reachability(host_name, protocol, reachable):
+    """
+    Records whether the host was reachable over the given protocol.
+    """
+    try:
+        reachability_cache.record(host_name, protocol, reachable)
+    except Exception as exception:
+        print(exception)
@@ -1,5 +1,4 @@
-import subprocess
-import platform
+from ping_helper import ping_hosts, format_ping_output
 
 def get_ping_output(host):
     """
@@ -8,15 +7,9 @@ def get_ping_output(host):
     Returns:str: The output of the ping command if successful, or an error message if the host is unreachable or the ping command fails.
     """
     try:
-        # Determine the OS and set the appropriate ping command
-        if platform.system().lower() == "windows":
-            command = ["ping", "-n", "1", "-w", "3000", str(host)]  # Windows-specific flags
-        else:
-            command = ["/bin/ping" if platform.system().lower() != "darwin" else "/sbin/ping", "-c1", "-w3", str(host)]  # Linux/macOS flags
-          # Run the ping command
-        response = subprocess.Popen(command, stdout=subprocess.PIPE).stdout.read()
-        # Decode and process the response
-        response = response.decode()
+        # One echo request with a 3 second timeout, sent over an ICMP socket (or the ping command without privileges)
+        ping_result = ping_hosts([host], count=1, timeout=3)[str(host)]
+        response = format_ping_output(ping_result)
         if response and response.strip():
             print(response)
             return response
@@ -6,6 +6,9 @@ import os
 import sys
 import paramiko
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 dir=os.path.dirname(os.path.abspath(__file__))
 dotenv_path = f"{dir}/../../.env"
@@ -13,19 +16,55 @@ load_dotenv(dotenv_path=dotenv_path)
 urllib3_logger = logging.getLogger('urllib3')
 urllib3_logger.setLevel(logging.CRITICAL)
 
+WINRM_POOL_MAX_PER_HOST = int(os.getenv('WINRM_POOL_MAX_PER_HOST', 4))
+WINRM_POOL_IDLE_TIMEOUT = int(os.getenv('WINRM_POOL_IDLE_TIMEOUT', 300))
+WINRM_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv('WINRM_POOL_HEALTH_CHECK_INTERVAL', 60))
+WINRM_POOL_ACQUIRE_TIMEOUT = int(os.getenv('WINRM_POOL_ACQUIRE_TIMEOUT', 120))
+# pywinrm requires the HTTP read timeout to be longer than the WS-Management operation timeout
+WINRM_OPERATION_TIMEOUT = int(os.getenv('WINRM_OPERATION_TIMEOUT', 20))
+WINRM_READ_TIMEOUT = int(os.getenv('WINRM_READ_TIMEOUT', 30))
+SSH_POOL_IDLE_TIMEOUT = int(os.getenv('SSH_POOL_IDLE_TIMEOUT', 300))
+SSH_POOL_KEEPALIVE_INTERVAL = int(os.getenv('SSH_POOL_KEEPALIVE_INTERVAL', 30))
+SSH_STREAM_CHUNK_SIZE = int(os.getenv('SSH_STREAM_CHUNK_SIZE', 32768))
+SSH_STREAM_MAX_LINE_LENGTH = int(os.getenv('SSH_STREAM_MAX_LINE_LENGTH', 65536))
+# OpenSSH allows 10 sessions per connection by default (MaxSessions)
+SSH_MAX_CHANNELS_PER_TRANSPORT = int(os.getenv('SSH_MAX_CHANNELS_PER_TRANSPORT', 8))
+SSH_PARALLEL_COMMAND_TIMEOUT = float(os.getenv('SSH_PARALLEL_COMMAND_TIMEOUT', 120))
+# the echoed sudo password and the sudo prompt only ever appear in the first lines of a PTY session
+SSH_SUDO_PREAMBLE_LINES = 3
 
-def is_ping_success(host, count):
+
+def is_ping_success(host, count, timeout=None):
     """
+    Checks whether a host answers ICMP echo requests.
+    Up to `count` echo requests are sent through the ping engine in ping_helper, which stops as soon as the
+    host has answered once; use ping_helper.ping_hosts to check many hosts in one sweep. A fresh entry in the
+    reachability cache answers without sending anything.
+    Args:
+        host (str): The host name or IP address to ping.
+        count (int): The maximum number of echo requests to send.
+        timeout (float): Seconds to wait for a reply after the last request (default PING_TIMEOUT), capped
+            by the enclosing deadline.
+    Returns:bool: True if the host answered, otherwise False.
     """
-    import subprocess
-    import platform
-    ping_command = ['ping', '-c', str(count), host]  # Default ping command for Unix-like systems
-    if platform.system() == 'Windows':
-        ping_command = ['ping', '-n', str(count), host]  # Use Windows-specific ping flag
-
+    from ping_helper import ping_hosts, PING_TIMEOUT, PING_PACKET_INTERVAL
+    from reachability_cache_helper import get_cached_reachability, record_reachability, PING
+    from deadline_helper import get_step_timeout, get_current_deadline
     try:
-        response = subprocess.run(ping_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return response.returncode == 0  # Check the response code to determine success
+        cached_status = get_cached_reachability(host, PING)
+        if cached_status is not None:
+            return cached_status == "Success"
+        count = int(count)
+        deadline = get_current_deadline()
+        if deadline is not None:
+            # keep the whole probe, including the gaps between the requests, inside the budget
+            count = max(1, min(count, int(deadline.remaining() // PING_PACKET_INTERVAL)))
+        timeout = get_step_timeout(timeout or PING_TIMEOUT)
+        if deadline is not None:
+            timeout = max(0.5, min(timeout, deadline.remaining() - (count - 1) * PING_PACKET_INTERVAL))
+        success = ping_hosts([host], count, timeout, stop_on_first_reply=True)[str(host)]["success"]
+        record_reachability(host, PING, success)
+        return success
     except Exception as exception:
         print(f"Error during ping: {exception}")
         return False
@@ -44,57 +83,327 @@ def get_winrm_connection(host_name, is_ntlm=True):
             account_key = password
             if is_ntlm == True:
                 connection = winrm.Session(
-                    host_name, auth=(account_name, account_key), transport='ntlm')
+                    host_name, auth=(account_name, account_key), transport='ntlm',
+                    read_timeout_sec=WINRM_READ_TIMEOUT, operation_timeout_sec=WINRM_OPERATION_TIMEOUT)
             else:
                 connection = winrm.Session(
-                    host_name, auth=(account_name, account_key))
+                    host_name, auth=(account_name, account_key),
+                    read_timeout_sec=WINRM_READ_TIMEOUT, operation_timeout_sec=WINRM_OPERATION_TIMEOUT)
     except Exception as exception:
         print(exception)
     return connection
 
 
+class WinrmSessionPool:
+    """
+    Host keyed pool of authenticated winrm.Session objects.
+    A winrm.Session keeps its requests.Session (and therefore the keep-alive HTTP connection and the NTLM
+    security context) once the first message has been sent, so handing the same session back to the next
+    caller for that host skips the TCP connect and the NTLM handshake. Sessions are checked out exclusively,
+    at most `max_per_host` sessions exist per host, idle sessions are evicted after `idle_timeout` seconds
+    and a session idle longer than `health_check_interval` seconds is probed before it is reused.
+    """
+
+    def __init__(self, max_per_host=WINRM_POOL_MAX_PER_HOST, idle_timeout=WINRM_POOL_IDLE_TIMEOUT,
+                 health_check_interval=WINRM_POOL_HEALTH_CHECK_INTERVAL, acquire_timeout=WINRM_POOL_ACQUIRE_TIMEOUT):
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._idle = {}
+        self._in_use = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, host_name, is_ntlm=True):
+        """
+        Checks out a session for the host, reusing an idle one when possible.
+        Args:
+            host_name (str): The IP address or host name of the remote Windows machine.
+            is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+        Returns:
+            winrm.Session: A session reserved for the caller, or None if no session could be created.
+        """
+        from deadline_helper import get_step_timeout
+        key = (host_name, bool(is_ntlm))
+        deadline = time.monotonic() + get_step_timeout(self.acquire_timeout)
+        with self._condition:
+            self._evict_idle()
+            while True:
+                idle_sessions = self._idle.get(key, [])
+                if idle_sessions:
+                    session, last_used = idle_sessions.pop()
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    break
+                if self._in_use.get(key, 0) < self.max_per_host:
+                    session, last_used = None, None
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Timed out waiting for a pooled WinRM session for {host_name}")
+                    return None
+                self._condition.wait(remaining)
+        if session is not None and time.monotonic() - last_used > self.health_check_interval:
+            if not self._is_healthy(session):
+                self._close(session)
+                session = None
+        if session is None:
+            session = get_winrm_connection(host_name, bool(is_ntlm))
+            if session is None:
+                self._release_slot(key)
+        return session
+
+    def release(self, host_name, session, is_ntlm=True, discard=False):
+        """
+        Returns a checked out session to the pool.
+        Args:
+            host_name (str): The host the session was acquired for.
+            session (winrm.Session): The session returned by acquire.
+            is_ntlm (bool): The authentication flag the session was acquired with.
+            discard (bool): If True, the session is closed instead of being kept for reuse (e.g. after a transport error).
+        """
+        if session is None:
+            return
+        key = (host_name, bool(is_ntlm))
+        if discard:
+            self._close(session)
+            self._release_slot(key)
+            return
+        with self._condition:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            self._idle.setdefault(key, []).append((session, time.monotonic()))
+            self._condition.notify_all()
+
+    def close_host(self, host_name):
+        """
+        Closes every idle session held for a host, e.g. after the host has been rebooted.
+        """
+        with self._condition:
+            stale = [key for key in self._idle if key[0] == host_name]
+            sessions = [entry[0] for key in stale for entry in self._idle.pop(key)]
+        for session in sessions:
+            self._close(session)
+
+    def close_all(self):
+        """
+        Closes every idle session in the pool.
+        """
+        with self._condition:
+            sessions = [entry[0] for entries in self._idle.values() for entry in entries]
+            self._idle = {}
+        for session in sessions:
+            self._close(session)
+
+    def _release_slot(self, key):
+        with self._condition:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            self._condition.notify_all()
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for key in list(self._idle):
+            fresh = []
+            for session, last_used in self._idle[key]:
+                if now - last_used > self.idle_timeout:
+                    self._close(session)
+                else:
+                    fresh.append((session, last_used))
+            if fresh:
+                self._idle[key] = fresh
+            else:
+                del self._idle[key]
+
+    @staticmethod
+    def _is_healthy(session):
+        try:
+            response = session.run_cmd('echo', ['ok'])
+            return response is not None and response.status_code == 0
+        except Exception as exception:
+            print(f"Pooled WinRM session failed health check: {exception}")
+            return False
+
+    @staticmethod
+    def _close(session):
+        try:
+            transport = session.protocol.transport
+            if hasattr(transport, 'close_session'):
+                transport.close_session()
+            elif getattr(transport, 'session', None) is not None:
+                transport.session.close()
+                transport.session = None
+        except Exception as exception:
+            print(exception)
+
+
+winrm_session_pool = WinrmSessionPool()
+
+
+def set_winrm_session_timeouts(session):
+    """
+    Shortens the read and operation timeouts of a (pooled) WinRM session to what is left of the enclosing
+    deadline, or restores the defaults outside of one. The read timeout bounds the TCP connect and every
+    HTTP exchange, the operation timeout bounds each WS-Management receive.
+    """
+    from deadline_helper import get_step_timeout
+    read_timeout = max(2, get_step_timeout(WINRM_READ_TIMEOUT))
+    operation_timeout = max(1, min(WINRM_OPERATION_TIMEOUT, read_timeout - 1))
+    protocol = session.protocol
+    protocol.read_timeout_sec = read_timeout
+    protocol.operation_timeout_sec = operation_timeout
+    if hasattr(protocol.transport, 'read_timeout_sec'):
+        protocol.transport.read_timeout_sec = read_timeout
+
+
+@contextmanager
+def pooled_winrm_session(host_name, is_ntlm=True):
+    """
+    Context manager that lends a pooled WinRM session for the duration of the block.
+    The session is returned to the pool on normal exit and discarded if the block raises or the enclosing
+    deadline timed out, so a broken or abandoned connection is never handed to the next caller. Aborting
+    the deadline closes the session while the block is still using it.
+    Args:
+        host_name (str): The IP address or host name of the remote Windows machine.
+        is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+    Yields:
+        winrm.Session: The pooled session, or None if no session could be created.
+    """
+    from deadline_helper import get_current_deadline
+    session = winrm_session_pool.acquire(host_name, is_ntlm)
+    deadline = get_current_deadline()
+    close_session = lambda: WinrmSessionPool._close(session)
+    if deadline is not None and session is not None:
+        deadline.add_abort_callback(close_session)
+    try:
+        yield session
+    except Exception:
+        winrm_session_pool.release(host_name, session, is_ntlm, discard=True)
+        session = None
+        raise
+    finally:
+        if deadline is not None:
+            deadline.remove_abort_callback(close_session)
+        if session is not None:
+            winrm_session_pool.release(host_name, session, is_ntlm, discard=deadline is not None and deadline.timed_out)
+
+
+def get_winrm_session(host_name, is_ntlm=True):
+    """
+    Returns a pooled WinRM session for callers that drive the session directly (e.g. run_cmd).
+    The caller owns the session until it hands it back with release_winrm_session.
+    Args:
+        host_name (str): The IP address or host name of the remote Windows machine.
+        is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+    Returns:
+        winrm.Session: A pooled session, or None if no session could be created.
+    """
+    return winrm_session_pool.acquire(host_name, is_ntlm)
+
+
+def release_winrm_session(host_name, session, is_ntlm=True, discard=False):
+    """
+    Hands a session obtained from get_winrm_session back to the pool.
+    """
+    winrm_session_pool.release(host_name, session, is_ntlm, discard)
+
+
 def get_winrm_script_result(host_name, command_text, is_ntlm=True):
     """
     Executes a PowerShell command on a remote Windows machine via WinRM and returns the output.
-    This function sends a command to a remote Windows host over a WinRM session and captures its output. It uses
+    This function sends a command to a remote Windows host over a pooled WinRM session and captures its output. It uses
     PowerShell to execute the command and handles command parsing to ensure proper execution.
+    The call is admitted through the remote execution engine, so it shares the process wide and per-host
+    concurrency limits with async_get_winrm_script_result.
     Args:
         host (str): The IP address or host name of the remote Windows machine.
         command (str): The command to execute on the remote machine.
         is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
     Returns:
         str: The command's output if successfull, else None if an error occurs.
+    Raises:
+        deadline_helper.DeadlineExceeded: When the enclosing deadline runs out before the command finishes.
     """
-    result = None
-    connection = None
+    from async_remote_helper import remote_execution_engine
+    return remote_execution_engine.run_sync(host_name, execute_winrm_script, host_name, command_text, is_ntlm)
+
 
+def execute_winrm_script(host_name, command_text, is_ntlm=True):
+    """
+    Blocking implementation behind get_winrm_script_result and async_get_winrm_script_result.
+    Runs the PowerShell command on a pooled WinRM session without going through the concurrency limits, or in
+    the host's persistent PSRP runspace when WINRM_USE_PSRP is enabled and pypsrp is installed.
+    Whether the host could be reached is recorded in the reachability cache.
+    Returns:
+        str: The command's output if successfull, else None if an error occurs.
+    """
+    from reachability_cache_helper import record_reachability, WINRM
+    from psrp_helper import WINRM_USE_PSRP, is_psrp_available, psrp_runspace_manager
+    from circuit_breaker_helper import host_circuit_breakers
+    from deadline_helper import is_deadline_expired, mark_timeout
+    result = None
+    reachable = False
+    if is_deadline_expired():
+        print(f"Deadline passed, skipping WinRM command on {host_name}")
+        return None
+    if not host_circuit_breakers.allow_request(host_name):
+        print(f"Circuit for {host_name} is open, skipping WinRM command")
+        return None
     try:
-        if is_ntlm == True:
-            connection = get_winrm_connection(host_name, True)
+        if WINRM_USE_PSRP and is_psrp_available():
+            result = psrp_runspace_manager.run_script(host_name, command_text, is_ntlm)
+            reachable = True
         else:
-            connection = get_winrm_connection(host_name)
-        if connection is not None:
-            response = connection.run_ps(command_text)
-            if response is not None:
-                result = response.std_out.decode()
+            with pooled_winrm_session(host_name, is_ntlm) as connection:
+                if connection is not None:
+                    set_winrm_session_timeouts(connection)
+                    response = connection.run_ps(command_text)
+                    reachable = True
+                    if response is not None:
+                        result = response.std_out.decode()
     except Exception as exception:
         print(exception)
+        mark_timeout(exception)
+    record_reachability(host_name, WINRM, reachable)
+    host_circuit_breakers.record(host_name, reachable)
     return result
 
 
+def parse_command(command_text):
+    """
+    Wraps a PowerShell script into a single cmd line for session.run_cmd, the same way run_ps does.
+    Args:command_text (str): The PowerShell script.
+    Returns:str: A 'powershell -encodedcommand ...' command line.
+    """
+    from base64 import b64encode
+    encoded_script = b64encode(command_text.encode('utf_16_le')).decode('ascii')
+    return 'powershell -encodedcommand {0}'.format(encoded_script)
+
+
+def get_winrm_result(host_name, command_text, is_ntlm=True):
+    """
+    Alias of get_winrm_script_result used by the VA helpers.
+    """
+    return get_winrm_script_result(host_name, command_text, is_ntlm)
+
+
 def get_winrm_connection_status(host_name, is_ntlm=True):
     """
     Checks if a Windows host is reachable via WinRM by running the 'Test-WSMan' command.
     This function tests whether the remote machine can be accessed via WinRM by executing the 'Test-WSMan' PowerShell 
-    command. If successful, the machine is considered reachable.
+    command. If successful, the machine is considered reachable. A fresh reachability cache entry, written by an
+    earlier probe or by any WinRM command to the host, is returned without contacting the host.
     Args:
         host_name (str): The IP address or host name of the remote Windows machine.
         is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
     Returns:
-        str: "Success" if the host is reachable via WinRM, otherwise "Failure".
+        str: "Success" if the host is reachable via WinRM, "Timeout" if the enclosing deadline ran out, otherwise "Failure".
     """
+    from reachability_cache_helper import get_cached_reachability, WINRM
+    from deadline_helper import get_current_deadline, mark_timeout, TIMEOUT
     status = "Failure"
     try:
+        cached_status = get_cached_reachability(host_name, WINRM)
+        if cached_status is not None:
+            return cached_status
         command = 'Test-WSMan'
         if is_ntlm == True:
             result = get_winrm_script_result(host_name, command, True)
@@ -104,9 +413,76 @@ def get_winrm_connection_status(host_name, is_ntlm=True):
             status = "Success"
     except Exception as exception:
         print(exception)
+        mark_timeout(exception)
+    if status != "Success" and get_current_deadline() is not None and get_current_deadline().timed_out:
+        status = TIMEOUT
     return status
 
 
+def get_winrm_reachable_status(host_name, is_ntlm=True):
+    """
+    Alias of get_winrm_connection_status used by the VA helpers.
+    """
+    return get_winrm_connection_status(host_name, is_ntlm)
+
+
+def get_ssh_connection_params(db_connection=None):
+    """
+    Resolves the SSH credentials to use for a Linux host.
+    Environment variables take precedence over the optional db_connection dictionary.
+    Args:
+        db_connection (dict): Optional dictionary containing 'username' and 'password' for authentication.
+    Returns:
+        dict: A dictionary with 'username' and 'password' keys.
+    """
+    username = os.environ['USER_NAME_LINUX']
+    password = os.environ['PASSWORD_LINUX']
+    if username and password:
+        connection_params = {'username': username, 'password': password}
+    elif db_connection:
+        connection_params = db_connection
+    else:
+        connection_params = {'username': 'SSHSERVICEACCOUNT', 'password': 'your_password'}
+    return connection_params
+
+
+def get_host_circuit_state(host_name):
+    """
+    Returns the circuit breaker state of a host, so a bot can escalate at once instead of waiting for
+    connection timeouts against a host that is known to be down.
+    Args:host_name (str): The IP address or host name.
+    Returns:
+        dict: {"state": "closed"/"open"/"half-open", "failure_rate": float, "calls": int, "retry_after": float}.
+        "retry_after" is the number of seconds until the next trial call is allowed.
+    """
+    from circuit_breaker_helper import host_circuit_breakers
+    return host_circuit_breakers.get_state(host_name)
+
+
+def is_host_circuit_open(host_name):
+    """
+    Returns True while calls to the host are being refused by its circuit breaker.
+    """
+    from circuit_breaker_helper import host_circuit_breakers
+    return host_circuit_breakers.is_open(host_name)
+
+
+def reset_host_circuit(host_name=None):
+    """
+    Closes the circuit breaker of a host (or of every host when no host is given).
+    """
+    from circuit_breaker_helper import host_circuit_breakers
+    host_circuit_breakers.reset(host_name)
+
+
+def call_with_retry(host_name, function, *args, **kwargs):
+    """
+    Calls function(*args, **kwargs) with exponential backoff and jitter between failed attempts, stopping once
+    the host's circuit opens. See circuit_breaker_helper.call_with_retry for the keyword arguments
+    (max_attempts, is_failure, base_delay, max_delay).
+    """
+    from circuit_breaker_helper import call_with_retry as retry_call
+    return retry_call(host_name, function, *args, **kwargs)
 
 
 def get_ssh_client(host_name, db_connection=None):
@@ -114,39 +490,195 @@ def get_ssh_client(host_name, db_connection=None):
     Establishes an SSH connection to a remote Linux host using Paramiko.
     This function initiates an SSH connection to a remote Linux machine. It can authenticate using environment 
     variables or provided credentials. It ensures that the connection is securely established with the server.
+    The returned client is owned by the caller; use get_pooled_ssh_client to share a transport instead.
     Args:
         host_name (str): The IP address or host name of the remote Linux machine.
         db_connection (dict): Optional dictionary containing 'username' and 'password' for authentication.
     Returns:
         paramiko.SSHClient: A Paramiko SSH client object if the connection is successfully established, otherwise None.
     """
+    import socket
     import paramiko
-    import os
+    from deadline_helper import get_step_timeout, mark_timeout, REMOTE_CONNECT_TIMEOUT
     client = paramiko.SSHClient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    username = os.environ['USER_NAME_LINUX']
-    password = os.environ['PASSWORD_LINUX']
     try:
-        if username and password:
-            connection_params = {'username': username, 'password': password}
-        elif db_connection:
-            connection_params = db_connection
-        else:
-            connection_params = {'username': 'SSHSERVICEACCOUNT', 'password': 'your_password'}
-        client.connect(hostname=host_name, username=connection_params['username'], password=connection_params['password'])
+        connection_params = get_ssh_connection_params(db_connection)
+        connect_timeout = get_step_timeout(REMOTE_CONNECT_TIMEOUT)
+        client.connect(hostname=host_name, username=connection_params['username'], password=connection_params['password'],
+                       timeout=connect_timeout, banner_timeout=connect_timeout, auth_timeout=connect_timeout)
         if client.get_transport() and client.get_transport().is_active():
             return client
     except (paramiko.AuthenticationException, paramiko.SSHException) as e:
         print(f"Error establishing SSH connection: {e}")
+        mark_timeout(e)
+    except (socket.timeout, OSError) as e:
+        print(f"Error establishing SSH connection: {e}")
+        mark_timeout(e)
     except KeyError as e:
         print(f"Missing required key in connection parameters: {e}")
     return None
 
+
+class SshTransportPool:
+    """
+    Pool of authenticated paramiko clients keyed by host and user.
+    A paramiko transport multiplexes channels, so one authenticated transport per host and user is kept open
+    with SSH keepalives and every command gets its own channel on it. Transports unused for `idle_timeout`
+    seconds are closed, and a transport that has died is transparently replaced by a new connection.
+    """
+
+    def __init__(self, idle_timeout=SSH_POOL_IDLE_TIMEOUT, keepalive_interval=SSH_POOL_KEEPALIVE_INTERVAL):
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self._clients = {}
+        self._connect_locks = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, host_name, db_connection=None):
+        """
+        Returns the pooled client for the host and user, connecting if there is no live transport.
+        Args:
+            host_name (str): The IP address or host name of the remote Linux machine.
+            db_connection (dict): Optional dictionary containing 'username' and 'password' for authentication.
+        Returns:
+            paramiko.SSHClient: A connected client shared with other callers, or None if the connection fails.
+            Callers must not close it.
+        """
+        key = (host_name, get_ssh_connection_params(db_connection)['username'])
+        with self._lock:
+            self._evict_idle(exclude=key)
+            connect_lock = self._connect_locks.setdefault(key, threading.Lock())
+        with connect_lock:
+            with self._lock:
+                entry = self._clients.get(key)
+            if entry is not None and self._is_active(entry[0]):
+                client = entry[0]
+            else:
+                if entry is not None:
+                    self._close(entry[0])
+                client = get_ssh_client(host_name, db_connection)
+                if client is not None and self.keepalive_interval:
+                    client.get_transport().set_keepalive(self.keepalive_interval)
+            with self._lock:
+                if client is not None:
+                    self._clients[key] = [client, time.monotonic()]
+                else:
+                    self._clients.pop(key, None)
+        return client
+
+    def discard(self, host_name, db_connection=None):
+        """
+        Closes and forgets the pooled transport for the host and user, e.g. after a channel failed to open.
+        """
+        key = (host_name, get_ssh_connection_params(db_connection)['username'])
+        with self._lock:
+            entry = self._clients.pop(key, None)
+        if entry is not None:
+            self._close(entry[0])
+
+    def close_host(self, host_name):
+        """
+        Closes every pooled transport to a host, e.g. after the host has been rebooted.
+        """
+        with self._lock:
+            keys = [key for key in self._clients if key[0] == host_name]
+            entries = [self._clients.pop(key) for key in keys]
+        for entry in entries:
+            self._close(entry[0])
+
+    def close_all(self):
+        """
+        Closes every pooled transport.
+        """
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients = {}
+        for entry in entries:
+            self._close(entry[0])
+
+    def _evict_idle(self, exclude=None):
+        now = time.monotonic()
+        for key in list(self._clients):
+            client, last_used = self._clients[key]
+            if key != exclude and now - last_used > self.idle_timeout:
+                del self._clients[key]
+                self._close(client)
+
+    @staticmethod
+    def _is_active(client):
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.close()
+        except Exception as exception:
+            print(exception)
+
+
+ssh_transport_pool = SshTransportPool()
+
+
+def get_pooled_ssh_client(host_name, db_connection=None):
+    """
+    Returns a shared, kept-alive SSH client for the host from the transport pool.
+    No connection is attempted while the host's circuit breaker is open, and every attempt is recorded in it.
+    Args:
+        host_name (str): The IP address or host name of the remote Linux machine.
+        db_connection (dict): Optional dictionary containing 'username' and 'password' for authentication.
+    Returns:
+        paramiko.SSHClient: The pooled client (do not close it), or None if the connection fails or the circuit is open.
+    """
+    from circuit_breaker_helper import host_circuit_breakers
+    from deadline_helper import is_deadline_expired
+    if is_deadline_expired():
+        print(f"Deadline passed, skipping SSH connection to {host_name}")
+        return None
+    if not host_circuit_breakers.allow_request(host_name):
+        print(f"Circuit for {host_name} is open, skipping SSH connection")
+        return None
+    client = ssh_transport_pool.get_client(host_name, db_connection)
+    host_circuit_breakers.record(host_name, client is not None)
+    return client
+
+
+def exec_ssh_command(host_name, command_text, get_pty=False, db_connection=None):
+    """
+    Opens a new channel on the pooled transport for the host and starts a command on it.
+    If the channel cannot be opened because the pooled transport has gone away, the transport is replaced
+    and the command is started once more on a fresh connection. Reads on the returned streams time out
+    after REMOTE_READ_TIMEOUT seconds, or when the enclosing deadline runs out.
+    Args:
+        host_name (str): The IP address or host name of the remote Linux machine.
+        command_text (str): The command to execute.
+        get_pty (bool): Whether to request a pseudo-terminal for the command.
+        db_connection (dict): Optional dictionary for authentication credentials.
+    Returns:
+        tuple: (stdin, stdout, stderr) of the started command, or None if no connection could be made.
+    """
+    import paramiko
+    from deadline_helper import get_step_timeout, REMOTE_READ_TIMEOUT
+    for attempt in range(2):
+        client = get_pooled_ssh_client(host_name, db_connection)
+        if client is None:
+            return None
+        try:
+            return client.exec_command(command_text, get_pty=get_pty, timeout=get_step_timeout(REMOTE_READ_TIMEOUT))
+        except (paramiko.SSHException, EOFError, OSError) as exception:
+            print(f"Pooled SSH transport to {host_name} failed, reconnecting: {exception}")
+            ssh_transport_pool.discard(host_name, db_connection)
+    return None
+
+
 def get_ssh_script_result(host_name, command_text, sudo_access=True, db_connection=None):
     """
     Executes a script or command on a remote Linux host via SSH and returns the result.
     This function runs a command or script on the remote Linux machine through an SSH session, with optional 
     sudo privileges. It captures and returns the output of the script.
+    The call is admitted through the remote execution engine, so it shares the process wide and per-host
+    concurrency limits with async_get_ssh_script_result.
     Args:
         host_name (str): The IP address or host name of the remote Linux machine.
         command_text (str): The command or script to execute.
@@ -154,17 +686,40 @@ def get_ssh_script_result(host_name, command_text, sudo_access=True, db_connecti
         db_connection (dict): Optional dictionary for authentication credentials.
     Returns:
         str: The output of the executed script or command, or None if an error occurs.
+    Raises:
+        deadline_helper.DeadlineExceeded: When the enclosing deadline runs out before the command finishes.
     """
+    from async_remote_helper import remote_execution_engine
+    return remote_execution_engine.run_sync(host_name, execute_ssh_script, host_name, command_text, sudo_access, db_connection)
+
+
+def execute_ssh_script(host_name, command_text, sudo_access=True, db_connection=None):
+    """
+    Blocking implementation behind get_ssh_script_result and async_get_ssh_script_result.
+    Runs the command on a new channel of the pooled SSH transport without going through the concurrency limits.
+    Whether the host could be reached is recorded in the reachability cache. Aborting the enclosing deadline
+    closes the channel, which ends a read that is still waiting for output.
+    Returns:
+        list: The output lines of the executed command, or None if an error occurs.
+    """
+    from reachability_cache_helper import record_reachability, SSH
+    from deadline_helper import get_current_deadline, is_deadline_expired, mark_timeout
     password = os.environ['PASSWORD_LINUX']
+    deadline = get_current_deadline()
+    close_channel = None
     try:
         ssh_result = []
         script_result = None
         result = ''
-        client = get_ssh_client(host_name, db_connection)
-        if client is not None:
-            if sudo_access:
-                command_text = "sudo %s" % command_text
-            stdin, stdout, stderr = client.exec_command(command_text, get_pty=True)
+        if sudo_access:
+            command_text = "sudo %s" % command_text
+        streams = exec_ssh_command(host_name, command_text, get_pty=True, db_connection=db_connection)
+        record_reachability(host_name, SSH, streams is not None)
+        if streams is not None:
+            stdin, stdout, stderr = streams
+            if deadline is not None:
+                close_channel = stdout.channel.close
+                deadline.add_abort_callback(close_channel)
             if sudo_access:
                 stdin.write(password + "\n")
                 stdin.flush()
@@ -173,7 +728,11 @@ def get_ssh_script_result(host_name, command_text, sudo_access=True, db_connecti
                 if output != password and not output.startswith('***'):
                     ssh_result.append(output)
                 result = "Success"
-            client.close()
+                if is_deadline_expired():
+                    stdout.channel.close()
+                    print(f"Deadline passed while reading SSH output from {host_name}")
+                    return None
+            stdout.channel.close()
             if result != "Success" and stderr is not None:
                 print("ERROR: ", str(stderr))
             if len(ssh_result) >= 1:
@@ -182,8 +741,154 @@ def get_ssh_script_result(host_name, command_text, sudo_access=True, db_connecti
         return script_result
     except Exception as exception:
         print(f"Error executing SSH command: {exception}")
+        if not mark_timeout(exception):
+            record_reachability(host_name, SSH, False)
         return None
+    finally:
+        if close_channel is not None:
+            deadline.remove_abort_callback(close_channel)
         
+def iter_ssh_script_lines(host_name, command_text, sudo_access=True, db_connection=None, max_lines=None,
+                          chunk_size=SSH_STREAM_CHUNK_SIZE, max_line_length=SSH_STREAM_MAX_LINE_LENGTH):
+    """
+    Streaming variant of get_ssh_script_result that yields output lines as they arrive from the channel.
+    Output is read in chunks of at most `chunk_size` bytes and decoded incrementally, so only the current
+    partial line is buffered locally (lines longer than `max_line_length` characters are yielded in pieces).
+    The echoed sudo password is filtered from the first lines of output only. The channel is closed as soon
+    as `max_lines` lines have been yielded or the caller stops iterating, without waiting for the remote
+    command to finish.
+    Args:
+        host_name (str): The IP address or host name of the remote Linux machine.
+        command_text (str): The command or script to execute.
+        sudo_access (bool): Whether to execute the command with sudo privileges (default: True).
+        db_connection (dict): Optional dictionary for authentication credentials.
+        max_lines (int): Optional number of lines after which the command is abandoned.
+        chunk_size (int): Maximum number of bytes read from the channel at a time.
+        max_line_length (int): Maximum number of characters buffered for a single line.
+    Yields:
+        str: Each output line, stripped of surrounding whitespace and carriage returns.
+    """
+    import codecs
+    from reachability_cache_helper import record_reachability, SSH
+    from deadline_helper import get_step_timeout, mark_timeout, REMOTE_READ_TIMEOUT
+    password = os.environ['PASSWORD_LINUX']
+    if sudo_access:
+        command_text = "sudo %s" % command_text
+    streams = exec_ssh_command(host_name, command_text, get_pty=True, db_connection=db_connection)
+    record_reachability(host_name, SSH, streams is not None)
+    if streams is None:
+        return
+    stdin, stdout, stderr = streams
+    channel = stdout.channel
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    line_index = 0
+    yielded_lines = 0
+    try:
+        if sudo_access:
+            stdin.write(password + "\n")
+            stdin.flush()
+        while max_lines is None or yielded_lines < max_lines:
+            channel.settimeout(get_step_timeout(REMOTE_READ_TIMEOUT))
+            chunk = channel.recv(chunk_size)
+            pending += decoder.decode(chunk, final=not chunk)
+            lines = pending.split('\n')
+            pending = lines.pop()
+            if len(pending) >= max_line_length or (not chunk and pending):
+                lines.append(pending)
+                pending = ''
+            for line in lines:
+                line = line.replace('\r', '').strip()
+                line_index += 1
+                if line_index <= SSH_SUDO_PREAMBLE_LINES and (line == password or line.startswith('***')):
+                    continue
+                yield line
+                yielded_lines += 1
+                if max_lines is not None and yielded_lines >= max_lines:
+                    break
+            if not chunk:
+                break
+    except Exception as exception:
+        print(f"Error streaming SSH command output: {exception}")
+        mark_timeout(exception)
+    finally:
+        channel.close()
+
+
+def run_ssh_commands_parallel(host_name, commands, sudo_access=False, db_connection=None, timeout=SSH_PARALLEL_COMMAND_TIMEOUT):
+    """
+    Runs several commands at the same time as separate channels on the host's pooled SSH transport.
+    At most SSH_MAX_CHANNELS_PER_TRANSPORT channels are open at once (the rest wait for a free slot), and
+    stdout, stderr and the exit status of every command are collected independently. No PTY is allocated;
+    with sudo_access the commands run through 'sudo -S' and the password is written to their stdin.
+    Args:
+        host_name (str): The IP address or host name of the remote Linux machine.
+        commands (list): The commands to execute.
+        sudo_access (bool): Whether to execute the commands with sudo privileges (default: False).
+        db_connection (dict): Optional dictionary for authentication credentials.
+        timeout (float): Seconds after which commands still running are abandoned, capped by the enclosing deadline.
+    Returns:
+        list: One dictionary per command, in the order given, with "command", "stdout" and "stderr" (lists of
+        lines), "exit_status" (int, or None if the command did not finish) and "error" (str or None).
+    """
+    import select
+    from reachability_cache_helper import record_reachability, SSH
+    from deadline_helper import get_step_timeout, mark_timeout
+    timeout = get_step_timeout(timeout)
+    results = [{"command": command_text, "stdout": [], "stderr": [], "exit_status": None, "error": None} for command_text in commands]
+    client = get_pooled_ssh_client(host_name, db_connection)
+    record_reachability(host_name, SSH, client is not None)
+    if client is None:
+        for result in results:
+            result["error"] = "SSH connection failed"
+        return results
+    password = os.environ['PASSWORD_LINUX']
+    transport = client.get_transport()
+    pending = list(enumerate(commands))
+    running = {}
+    deadline = time.monotonic() + timeout
+    try:
+        while pending or running:
+            while pending and len(running) < SSH_MAX_CHANNELS_PER_TRANSPORT:
+                index, command_text = pending.pop(0)
+                try:
+                    channel = transport.open_session(timeout=max(1, deadline - time.monotonic()))
+                    channel.exec_command("sudo -S -p '' %s" % command_text if sudo_access else command_text)
+                    if sudo_access:
+                        channel.sendall(password + "\n")
+                    channel.shutdown_write()
+                    running[channel] = (index, bytearray(), bytearray())
+                except Exception as exception:
+                    results[index]["error"] = str(exception)
+            remaining = deadline - time.monotonic()
+            if not running or remaining <= 0:
+                break
+            select.select(list(running), [], [], min(remaining, 1.0))
+            for channel in list(running):
+                index, stdout_data, stderr_data = running[channel]
+                while channel.recv_ready():
+                    stdout_data += channel.recv(32768)
+                while channel.recv_stderr_ready():
+                    stderr_data += channel.recv_stderr(32768)
+                if channel.eof_received and channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                    results[index]["stdout"] = [line.strip() for line in stdout_data.decode(errors='replace').splitlines()]
+                    results[index]["stderr"] = [line.strip() for line in stderr_data.decode(errors='replace').splitlines()]
+                    results[index]["exit_status"] = channel.recv_exit_status()
+                    channel.close()
+                    del running[channel]
+    except Exception as exception:
+        print(f"Error executing parallel SSH commands: {exception}")
+    for channel, (index, stdout_data, stderr_data) in running.items():
+        results[index]["stdout"] = [line.strip() for line in stdout_data.decode(errors='replace').splitlines()]
+        results[index]["error"] = f"Command did not finish within {timeout} seconds"
+        channel.close()
+    for index, command_text in pending:
+        results[index]["error"] = f"Command was not started within {timeout} seconds"
+    if running or pending:
+        mark_timeout()
+    return results
+
+
 def get_ssh_reachable_status(host_name, db_connection=None):
     """
     Checks if a Linux host is reachable via SSH by attempting to execute a simple 'pwd' command on the remote machine.
@@ -194,18 +899,31 @@ def get_ssh_reachable_status(host_name, db_connection=None):
         str: 
             - "Success" if the SSH connection is established and the 'pwd' command is executed successfully.
             - "Failure" if the SSH connection could not be established or the command execution fails.
+            - "Timeout" if the enclosing deadline ran out first.
+        A fresh reachability cache entry, written by an earlier probe or by any SSH command to the host, is
+        returned without contacting the host.
     """
+    from reachability_cache_helper import get_cached_reachability, record_reachability, SSH
+    from deadline_helper import get_current_deadline, mark_timeout, TIMEOUT
     status = "Failure"
     try:
-        # Establish SSH connection
-        client = get_ssh_client(host_name, db_connection)
-        if client is not None:
-            # Execute a simple command (e.g., 'pwd') to verify connectivity
-            stdin, stdout, stderr = client.exec_command("pwd")
+        cached_status = get_cached_reachability(host_name, SSH)
+        if cached_status is not None:
+            return cached_status
+        # Execute a simple command (e.g., 'pwd') on the pooled connection to verify connectivity
+        streams = exec_ssh_command(host_name, "pwd", db_connection=db_connection)
+        if streams is not None:
+            stdin, stdout, stderr = streams
             # If stdout has output, the connection was successful
             for line in stdout:
                 status = "Success"
+            stdout.channel.close()
     except Exception as exception:
         # Print any errors encountered during the process
         print(exception)
+        mark_timeout(exception)
+    deadline = get_current_deadline()
+    if status != "Success" and deadline is not None and deadline.timed_out:
+        return TIMEOUT
+    record_reachability(host_name, SSH, status == "Success")
     return status
@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 dir=os.path.dirname(os.path.abspath(__file__))
 dotenv_path = f"{dir}/../../.env"
 load_dotenv(dotenv_path=dotenv_path)
-from zif_mongo_helper import get_single_document
+from config_cache_helper import get_config_document
 query={"tenantId": "6735248edb0aefa5f65131b0", "key": "CPUMemoryResourceRemediation"}
 host = f"https://{os.getenv('SN_INSTANCE')}.service-now.com"
 headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
@@ -69,7 +69,7 @@ def create_incident(fpayload):
         del payload['alertDescription']
         del payload['_id']
         payload['alertDateTime']=payload['alertDateTime'].strftime('%Y-%m-%d %H:%M:%S')
-        mongodoc=get_single_document(query)
+        mongodoc=get_config_document(query)
         data={
             'description':payload,
             'short_description':mongodoc['shortDescription'].format(alertType=payload['alertType'],hostName=payload['hostName']),
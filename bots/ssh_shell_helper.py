@@ -0,0 +1,252 @@
+import os
+import re
+import time
+import uuid
+import base64
+import socket
+import threading
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+SSH_SHELL_OPEN_TIMEOUT = float(os.getenv('SSH_SHELL_OPEN_TIMEOUT', 20))
+SSH_SHELL_COMMAND_TIMEOUT = float(os.getenv('SSH_SHELL_COMMAND_TIMEOUT', 120))
+SSH_SHELL_IDLE_TIMEOUT = float(os.getenv('SSH_SHELL_IDLE_TIMEOUT', 300))
+
+
+class PrivilegedShellSession:
+    """
+    A root shell kept open on one channel of the pooled SSH transport.
+    sudo is authenticated once when the session opens (the password is only sent if sudo actually prompts for
+    it), after which every command runs in that shell without a PTY. Each command is sent base64 encoded,
+    runs in a subshell with stdin from /dev/null and stderr merged into stdout (as with the PTY the one-shot
+    helpers use), and is followed by a random sentinel carrying its exit code, which frames the output.
+    """
+
+    def __init__(self, host_name, db_connection=None):
+        self.host_name = host_name
+        self.db_connection = db_connection
+        self.channel = None
+        self.last_used = time.monotonic()
+        self._sentinel = f"__BOTGEN_{uuid.uuid4().hex}__"
+        self._sentinel_pattern = re.compile(re.escape(self._sentinel) + r' (\d+)\n')
+        self._buffer = ''
+
+    def open(self, timeout=SSH_SHELL_OPEN_TIMEOUT):
+        """
+        Opens the channel and authenticates sudo.
+        Returns:bool: True if the root shell is ready, otherwise False (the channel is closed again).
+        """
+        from remote_connection_helper import get_pooled_ssh_client
+        client = get_pooled_ssh_client(self.host_name, self.db_connection)
+        if client is None:
+            return False
+        prompt = f"__BOTGEN_SUDO_{uuid.uuid4().hex}__"
+        ready = f"__BOTGEN_READY_{uuid.uuid4().hex}__"
+        deadline = time.monotonic() + timeout
+        try:
+            self.channel = client.get_transport().open_session(timeout=timeout)
+            self.channel.exec_command(f"sudo -S -p '{prompt}' bash -c 'echo {ready}; exec bash --noprofile --norc'")
+            password_sent = False
+            error_output = ''
+            output = ''
+            while ready not in output:
+                if time.monotonic() > deadline or self.channel.exit_status_ready():
+                    raise RuntimeError(f"privileged shell did not start: {error_output.replace(prompt, '').strip()}")
+                if self.channel.recv_stderr_ready():
+                    error_output += self.channel.recv_stderr(4096).decode(errors='replace')
+                    if prompt in error_output:
+                        if password_sent:
+                            raise RuntimeError("sudo rejected the password")
+                        password = os.environ['PASSWORD_LINUX']
+                        self.channel.sendall(password + "\n")
+                        password_sent = True
+                        error_output = error_output.replace(prompt, '')
+                elif self.channel.recv_ready():
+                    output += self.channel.recv(4096).decode(errors='replace')
+                else:
+                    time.sleep(0.01)
+            self._buffer = output.split(ready, 1)[1].lstrip('\n')
+            self.last_used = time.monotonic()
+            return True
+        except Exception as exception:
+            print(f"Error opening privileged shell on {self.host_name}: {exception}")
+            self.close()
+            return False
+
+    def run(self, command_text, timeout=SSH_SHELL_COMMAND_TIMEOUT):
+        """
+        Runs one command in the root shell.
+        Args:
+            command_text (str): The command or script to execute (without sudo).
+            timeout (float): Seconds to wait for the command to finish.
+        Returns:
+            tuple: (exit_code, output_lines).
+        Raises:
+            socket.timeout: If the command did not finish in time; the session is closed because the shell is
+                still busy with it.
+            Exception: If the channel fails; the session is closed.
+        """
+        encoded_command = base64.b64encode(command_text.encode()).decode()
+        framed_command = f"( eval \"$(printf %s {encoded_command} | base64 -d)\" ) </dev/null 2>&1; printf '%s %d\\n' {self._sentinel} $?\n"
+        deadline = time.monotonic() + timeout
+        try:
+            self.channel.sendall(framed_command)
+            match = self._sentinel_pattern.search(self._buffer)
+            while match is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout(f"command did not finish within {timeout} seconds")
+                self.channel.settimeout(remaining)
+                chunk = self.channel.recv(32768)
+                if not chunk:
+                    raise EOFError("privileged shell closed")
+                self._buffer += chunk.decode(errors='replace')
+                match = self._sentinel_pattern.search(self._buffer)
+        except Exception:
+            self.close()
+            raise
+        output = self._buffer[:match.start()]
+        self._buffer = self._buffer[match.end():]
+        self.last_used = time.monotonic()
+        return int(match.group(1)), [line.strip().replace('\r', '') for line in output.splitlines()]
+
+    def is_alive(self):
+        """
+        Returns True while the channel is open and the shell has not exited.
+        """
+        return self.channel is not None and not self.channel.closed and not self.channel.exit_status_ready()
+
+    def close(self):
+        """
+        Closes the channel, which ends the root shell. The pooled transport stays open.
+        """
+        channel, self.channel = self.channel, None
+        if channel is not None:
+            try:
+                channel.close()
+            except Exception as exception:
+                print(exception)
+
+
+class PrivilegedShellManager:
+    """
+    Keeps one PrivilegedShellSession per host and user, reopening it when it has died and closing it after
+    `idle_timeout` seconds without use. Commands to the same host are serialized on its session.
+    """
+
+    def __init__(self, idle_timeout=SSH_SHELL_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def run(self, host_name, command_text, timeout=SSH_SHELL_COMMAND_TIMEOUT, db_connection=None):
+        """
+        Runs a command as root on the host through its persistent shell session.
+        Returns:tuple: (exit_code, output_lines), or None if no session could be opened.
+        Raises:socket.timeout or channel errors from PrivilegedShellSession.run.
+        """
+        from remote_connection_helper import get_ssh_connection_params
+        from deadline_helper import get_step_timeout
+        timeout = get_step_timeout(timeout)
+        key = (host_name, get_ssh_connection_params(db_connection)['username'])
+        with self._lock:
+            self._evict_idle(exclude=key)
+            entry = self._entries.setdefault(key, {"session": None, "lock": threading.Lock()})
+        with entry["lock"]:
+            session = entry["session"]
+            if session is None or not session.is_alive():
+                session = PrivilegedShellSession(host_name, db_connection)
+                if not session.open(get_step_timeout(SSH_SHELL_OPEN_TIMEOUT)):
+                    entry["session"] = None
+                    return None
+                entry["session"] = session
+            return session.run(command_text, timeout)
+
+    def close_host(self, host_name):
+        """
+        Closes the shell sessions held for a host.
+        """
+        with self._lock:
+            entries = [self._entries.pop(key) for key in list(self._entries) if key[0] == host_name]
+        for entry in entries:
+            if entry["session"] is not None:
+                entry["session"].close()
+
+    def close_all(self):
+        """
+        Closes every shell session.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries = {}
+        for entry in entries:
+            if entry["session"] is not None:
+                entry["session"].close()
+
+    def _evict_idle(self, exclude=None):
+        now = time.monotonic()
+        for key in list(self._entries):
+            entry = self._entries[key]
+            session = entry["session"]
+            if key != exclude and session is not None and now - session.last_used > self.idle_timeout \
+                    and entry["lock"].acquire(blocking=False):
+                try:
+                    session.close()
+                    del self._entries[key]
+                finally:
+                    entry["lock"].release()
+
+
+privileged_shell_manager = PrivilegedShellManager()
+
+
+def run_privileged_command(host_name, command_text, timeout=SSH_SHELL_COMMAND_TIMEOUT, db_connection=None):
+    """
+    Runs a command as root on a Linux host through the persistent privileged shell.
+    Args:
+        host_name (str): The IP address or host name of the remote Linux machine.
+        command_text (str): The command or script to execute (without sudo).
+        timeout (float): Seconds to wait for the command to finish, capped by the enclosing deadline.
+        db_connection (dict): Optional dictionary for authentication credentials.
+    Returns:
+        dict: {"status": "Success"/"Failure"/"Timeout"/"Unavailable", "exit_code": int or None, "output": list of lines}.
+        "Unavailable" means no privileged shell could be opened and the command was not sent.
+    """
+    result = {"status": "Failure", "exit_code": None, "output": []}
+    try:
+        session_result = privileged_shell_manager.run(host_name, command_text, timeout, db_connection)
+        if session_result is None:
+            result["status"] = "Unavailable"
+        else:
+            result["exit_code"], result["output"] = session_result
+            result["status"] = "Success"
+    except socket.timeout as exception:
+        from deadline_helper import mark_timeout
+        print(f"Privileged command on {host_name} timed out: {exception}")
+        mark_timeout(exception)
+        result["status"] = "Timeout"
+    except Exception as exception:
+        print(f"Error executing privileged command: {exception}")
+    return result
+
+
+def get_privileged_script_result(host_name, command_text, db_connection=None):
+    """
+    Drop-in counterpart of get_ssh_script_result(host_name, command_text, sudo_access=True) that runs in the
+    persistent privileged shell instead of a fresh sudo + PTY channel.
+    Falls back to get_ssh_script_result when no privileged shell can be opened on the host. The command is
+    then sent as a single base64 encoded 'bash -c' argument, so sudo runs the whole script (multi-line
+    scripts and pipelines included) and not just its first command.
+    Returns:
+        list: The output lines of the command, or None if there was no output or an error occurred.
+    """
+    from remote_connection_helper import get_ssh_script_result
+    result = run_privileged_command(host_name, command_text, db_connection=db_connection)
+    if result["status"] == "Unavailable":
+        encoded_command = base64.b64encode(command_text.encode()).decode()
+        return get_ssh_script_result(host_name, f"bash -c \"$(printf %s {encoded_command} | base64 -d)\"", True, db_connection)
+    if result["status"] == "Success" and len(result["output"]) >= 1:
+        return result["output"]
+    return None
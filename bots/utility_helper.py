@@ -4,10 +4,10 @@ import requests
 import os
 from requests.auth import HTTPBasicAuth
 import json
-from remote_connection_helper import is_ping_success,get_winrm_connection_status,get_ssh_reachable_status
+from remote_connection_helper import is_ping_success,get_winrm_connection_status,get_ssh_reachable_status,get_host_circuit_state
 from servicenow import update_incident
 from dotenv import load_dotenv
-from zif_mongo_helper import get_single_document
+from config_cache_helper import get_config_document
 dir=os.path.dirname(os.path.abspath(__file__))
 dotenv_path = f"{dir}/../../.env"
 load_dotenv(dotenv_path=dotenv_path)
@@ -16,11 +16,20 @@ headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
 authentication = HTTPBasicAuth(os.getenv('SN_USERNAME'), os.getenv('SN_PASSWORD'))
 
 
-def get_result_table(result,is_linux):
+def get_result_table(result,is_linux,alert_type=None):
+    """
+    Renders top process results as HTML table rows. Besides the dictionaries (Linux) and PID|||Name|||usage
+    strings (Windows) returned to the workflows, lists of ProcessSample are accepted and formatted here,
+    with the usage of alert_type ('CPU' or 'MEMORY').
+    """
+    from process_sample_helper import ProcessSample
     table_result = None
     td_string ="<td style='font-family: calibri, tahoma, verdana; color: black; height: 10px;'>"
     count = 0
     try:
+        if result and isinstance(result[0], ProcessSample):
+            result = [sample.to_dict(alert_type) for sample in result]
+            is_linux = True
         if is_linux:
             processes = [[item for item in row.values()] for row in result]
             table_result = ""
@@ -83,7 +92,7 @@ def search_incident(filter_query):
 
 def work_in_progress(device_config,workflow_name):
     try:
-        mongodoc=get_single_document(query)
+        mongodoc=get_config_document(query)
         config = mongodoc[workflow_name]
         if config is not None and 'WIP' in config:
             incident_payload = config['WIP']['INCIDENT_PAYLOAD']
@@ -101,7 +110,11 @@ def is_device_reachable(device_config):
             retry_count = 3
             if retry_count is None:
                 retry_count = 3
-            if is_ping_success(device_config['hostName'],retry_count):
+            circuit_state = get_host_circuit_state(device_config['hostName'])
+            if circuit_state["state"] == "open":
+                status = "Circuit Open"
+                print(f"Circuit open for {device_config['hostName']}, retry after {circuit_state['retry_after']:.0f} seconds")
+            elif is_ping_success(device_config['hostName'],retry_count):
                 if device_config['isLinux']:
                     if get_ssh_reachable_status(device_config['hostName'])=="Success":
                         status = "Success"
@@ -132,7 +145,7 @@ def is_device_reachable(device_config):
 
 def device_unreachable_status(device_config,failureStatus,workflow_name):
     try:
-        mongodoc=get_single_document(query)
+        mongodoc=get_config_document(query)
         config = mongodoc[workflow_name]     
         if all([device_config,failureStatus,config]) and 'ESCALATE_DEVICE_UNREACHABLE' in config:
             sys_id = device_config.get('sys_id',None)
@@ -173,7 +186,7 @@ def get_incident_payload(status,incident,actual_threshold,process_result=None):
     """
     payload=None
     try:
-        mongodoc=get_single_document(query)
+        mongodoc=get_config_document(query)
         config = mongodoc['value']
         if status in config:
             payload = config[status]['INCIDENT_PAYLOAD']
@@ -47,21 +47,18 @@ def get_linux_server_uptime(host_name, db_connection=None):
     Raises:
     Exception: If an error occurs during the SSH command execution or client connection.
     """
-    from remote_connection_helper import get_ssh_client
+    from remote_connection_helper import exec_ssh_command
     result = None
     try:
-        client = get_ssh_client(host_name)
-        if client is not None:
-            stdin, stdout, stderr = client.exec_command('uptime')
+        streams = exec_ssh_command(host_name, 'uptime', db_connection=db_connection)
+        if streams is not None:
+            stdin, stdout, stderr = streams
             if stdout is not None:
                 uptime = stdout.read().decode().strip()
                 uptime = uptime.split('up ')[-1].split(',')[0].strip()
                 result = ''.join(filter(str.isdigit, uptime))
     except Exception as exception:
         print(exception)
-    finally:
-        if client is not None:
-            client.close()
     return result
 
 def windows_server_reboot(host_name, is_ntlm=True):
@@ -75,16 +72,20 @@ def windows_server_reboot(host_name, is_ntlm=True):
     Raises:
     Exception: If an error occurs during the WinRM session or command execution.
     """
-    from remote_connection_helper import get_winrm_session
+    from remote_connection_helper import pooled_winrm_session, winrm_session_pool
+    from reachability_cache_helper import reachability_cache
     result = False
     try:
         command = 'powershell -command "Restart-Computer -Force"'
-        session = get_winrm_session(host_name, is_ntlm=is_ntlm)
-        response = session.run_cmd(command)
-        if response is not None:
-            response_code = response.status_code
-            if response_code == 0:
-                result = True
+        with pooled_winrm_session(host_name, is_ntlm=is_ntlm) as session:
+            response = session.run_cmd(command)
+            if response is not None:
+                response_code = response.status_code
+                if response_code == 0:
+                    result = True
+        # pooled sessions and cached reachability of a rebooting host are stale, drop them
+        winrm_session_pool.close_host(host_name)
+        reachability_cache.invalidate(host_name)
     except Exception as exception:
         print(exception)
     return result
@@ -100,7 +101,9 @@ def linux_server_reboot(host_name, os_name, db_connection=None):
     Raises:
     Exception: If an error occurs during the SSH command execution or client connection.
     """
-    from remote_connection_helper import get_ssh_client
+    from remote_connection_helper import exec_ssh_command, ssh_transport_pool
+    from reachability_cache_helper import reachability_cache
+    from ssh_shell_helper import run_privileged_command, privileged_shell_manager
     from zif_workflow_helper import get_workflow_config_value
     command = None
     result = None
@@ -109,21 +112,30 @@ def linux_server_reboot(host_name, os_name, db_connection=None):
         result = get_workflow_config_value("VA_REBOOT_CONFIG")
         if result is not None and os_name.lower() in result:
             command = result[os_name.lower()]
-            client = get_ssh_client(host_name, db_connection=db_connection)
-            if all([client, command]):
-                #print("cmd  : ",command)
-                stdin, stdout, stderr = client.exec_command(command, get_pty=True)
-                status = True
-                script_result = []
-                password = os.environ['PASSWORD_LINUX']
-                if password is not None:
-                        stdin.write(password + "\n")
-                        stdin.flush()
-                for std_index in stdout:
-                    script_result.append(std_index)
+            if command:
+                # the shell usually dies with the host before the command returns, so a timeout still means it was issued
+                reboot_result = run_privileged_command(host_name, command, timeout=10, db_connection=db_connection)
+                if reboot_result["status"] in ("Success", "Timeout"):
+                    status = True
+                elif reboot_result["status"] == "Unavailable":
+                    streams = exec_ssh_command(host_name, command, get_pty=True, db_connection=db_connection)
+                    if streams is not None:
+                        #print("cmd  : ",command)
+                        stdin, stdout, stderr = streams
+                        status = True
+                        script_result = []
+                        password = os.environ['PASSWORD_LINUX']
+                        if password is not None:
+                                stdin.write(password + "\n")
+                                stdin.flush()
+                        for std_index in stdout:
+                            script_result.append(std_index)
     except Exception as exception:
         print(exception)
     finally:
-        if client is not None:
-            client.close()
+        if status:
+            # the pooled transport, the root shell and cached reachability do not survive the reboot
+            privileged_shell_manager.close_host(host_name)
+            ssh_transport_pool.close_host(host_name)
+            reachability_cache.invalidate(host_name)
     return status
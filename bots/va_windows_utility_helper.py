@@ -20,12 +20,18 @@ def winrm_device_status_check(ip_address, document_id):
         Raises:
             Exception: Catches and prints any exceptions that occur during the process.
         """
-        from remote_connection_helper import is_ping_success, get_winrm_reachable_status
+        from remote_connection_helper import is_ping_success, get_winrm_reachable_status, get_host_circuit_state
         from zif_workflow_helper import get_workflow_config_value, update_va_transaction_status
         device_details = {}
         device_details["status"] = None
         device_details["result"] = False
         try:
+                circuit_state = get_host_circuit_state(ip_address)
+                if circuit_state["state"] == "open":
+                        print(f"Circuit open for {ip_address}")
+                        device_details["status"] = f"Device Unreachable for {ip_address} (recent connection failures, retry after {circuit_state['retry_after']:.0f} seconds)"
+                        update_va_transaction_status(document_id, 'Failed', device_details["status"])
+                        return device_details
                 retry_count = get_workflow_config_value("REMEDIATION_RETRY_COUNT")
                 if retry_count is None:
                         retry_count = 3
@@ -156,16 +162,15 @@ def stop_application_service(host_name, service_list):
     Raises:
         Exception: Catches and prints any exceptions that occur during the process.
     """
-    from remote_connection_helper import parse_command
+    from remote_connection_helper import parse_command, get_winrm_session, release_winrm_session
+    connection = None
     task_result = {'id': None, 'name': None, 'status': None, 'stopDateTime': None}
     result_list = []
     counter = 1
     
     if all([host_name, service_list]):
         try:
-            user_name=os.environ['USER_NAME_WINDOWS']
-            password=os.environ['PASSWORD_WINDOWS']
-            connection = winrm.Session(host_name, auth=(user_name, password), transport='ntlm')
+            connection = get_winrm_session(host_name, is_ntlm=True)
             
             for service in service_list:
                 service_result = None
@@ -214,6 +219,10 @@ def stop_application_service(host_name, service_list):
                         task_result = {}
         except Exception as exception:
             print(exception)
+            release_winrm_session(host_name, connection, discard=True)
+            connection = None
+        finally:
+            release_winrm_session(host_name, connection)
             
     return result_list
 
@@ -232,15 +241,14 @@ def start_application_service(host_name, service_list):
     Raises:
         Exception: Catches and prints any exceptions that occur during the process.
     """
-    from remote_connection_helper import parse_command
+    from remote_connection_helper import parse_command, get_winrm_session, release_winrm_session
+    connection = None
     task_result = {'id': None, 'name': None, 'status': None, 'startDateTime': None}
     result_list = []
     counter = 1
     if all([host_name, service_list]):
         try:
-            user_name=os.environ['USER_NAME_WINDOWS']
-            password=os.environ['PASSWORD_WINDOWS']
-            connection = winrm.Session(host_name, auth=(user_name, password), transport='ntlm')
+            connection = get_winrm_session(host_name, is_ntlm=True)
             for service in service_list:
                 service_result = None
                 command_text = """$ServiceToStart = '{service_name}'
@@ -288,6 +296,10 @@ def start_application_service(host_name, service_list):
                         task_result = {}
         except Exception as exception:
             print(exception)
+            release_winrm_session(host_name, connection, discard=True)
+            connection = None
+        finally:
+            release_winrm_session(host_name, connection)
     #check it properly how its done 
     return result_list
 
@@ -0,0 +1,101 @@
+import base64
+
+PROBE_MARKER = '##BOTGEN-PROBE##'
+
+# Each probe runs in its own script block so a terminating error only fails that probe. Output, errors and
+# status are base64 encoded into one marker line per probe, which keeps the envelope intact whatever the
+# probes print.
+PROBE_TEMPLATE = """
+$ProbeStatus = 'Success'
+$ProbeOutput = ''
+$ProbeErrors = ''
+try {{
+    $ProbeRecords = @(& {{
+{script}
+    }} *>&1)
+    $ProbeOutput = $ProbeRecords | Where-Object {{ $_ -isnot [System.Management.Automation.ErrorRecord] -and $_ -isnot [System.Management.Automation.WarningRecord] -and $_ -isnot [System.Management.Automation.VerboseRecord] -and $_ -isnot [System.Management.Automation.DebugRecord] }} | Out-String
+    $ProbeErrors = $ProbeRecords | Where-Object {{ $_ -is [System.Management.Automation.ErrorRecord] }} | Out-String
+}} catch {{
+    $ProbeStatus = 'Failure'
+    $ProbeErrors = $_ | Out-String
+}}
+Write-Output ('{marker}|{index}|' + $ProbeStatus + '|' + [Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes([string]$ProbeOutput)) + '|' + [Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes([string]$ProbeErrors)))
+"""
+
+
+def build_probe_batch_script(probes):
+    """
+    Combines several named PowerShell probes into one script that reports every probe in a delimited envelope.
+    Args:probes (dict): {probe_name: PowerShell script}.
+    Returns:tuple: (script, probe_names) where probe_names gives the envelope index of every probe.
+    """
+    probe_names = list(probes)
+    script = "$ProgressPreference = 'SilentlyContinue'\n"
+    for index, probe_name in enumerate(probe_names):
+        script += PROBE_TEMPLATE.format(script=probes[probe_name], marker=PROBE_MARKER, index=index)
+    return script, probe_names
+
+
+def parse_probe_batch_output(output, probe_names):
+    """
+    Splits the envelope produced by build_probe_batch_script back into per-probe results.
+    Args:
+        output (str): The standard output of the batch script, or None if the call failed.
+        probe_names (list): The probe names returned by build_probe_batch_script.
+    Returns:
+        dict: {probe_name: {"status", "result", "error"}}. "result" holds the probe's output just like
+        get_winrm_script_result would have returned it; probes missing from the envelope are reported as
+        "Failure".
+    """
+    probe_results = {probe_name: {"status": "Failure", "result": None, "error": "No result returned for probe"} for probe_name in probe_names}
+    if output is None:
+        for probe_result in probe_results.values():
+            probe_result["error"] = "WinRM batch execution failed"
+        return probe_results
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith(PROBE_MARKER + '|'):
+            continue
+        try:
+            _, index, status, encoded_output, encoded_errors = line.split('|')
+            probe_name = probe_names[int(index)]
+            probe_results[probe_name] = {
+                "status": status,
+                "result": base64.b64decode(encoded_output).decode('utf-8', errors='replace') if status == "Success" else None,
+                "error": base64.b64decode(encoded_errors).decode('utf-8', errors='replace').strip() or None
+            }
+        except (ValueError, IndexError) as exception:
+            print(f"Malformed probe envelope line: {exception}")
+    return probe_results
+
+
+def get_winrm_batch_result(host_name, probes, is_ntlm=True):
+    """
+    Runs several named PowerShell probes on a Windows host in a single WinRM round trip.
+    The probes are executed one after another inside one remote PowerShell invocation, and a failing probe
+    does not prevent the others from reporting.
+    Args:
+        host_name (str): The IP address or host name of the remote Windows machine.
+        probes (dict): {probe_name: PowerShell script}.
+        is_ntlm (bool): If True, NTLM authentication is used for the WinRM session.
+    Returns:
+        dict: {probe_name: {"status": "Success"/"Failure", "result": str or None, "error": str or None}}.
+    """
+    from remote_connection_helper import get_winrm_script_result
+    probe_results = {}
+    try:
+        if host_name and probes:
+            script, probe_names = build_probe_batch_script(probes)
+            output = get_winrm_script_result(host_name, script, is_ntlm)
+            probe_results = parse_probe_batch_output(output, probe_names)
+    except Exception as exception:
+        print(exception)
+    return probe_results
+
+
+def get_winrm_batch_values(host_name, probes, is_ntlm=True):
+    """
+    Convenience wrapper around get_winrm_batch_result returning only the outputs.
+    Returns:dict: {probe_name: output str, or None if the probe failed}.
+    """
+    return {probe_name: probe_result["result"] for probe_name, probe_result in get_winrm_batch_result(host_name, probes, is_ntlm).items()}
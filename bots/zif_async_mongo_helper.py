@@ -0,0 +1,232 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+dir=os.path.dirname(os.path.abspath(__file__))
+dotenv_path = f"{dir}/../../.env"
+load_dotenv(dotenv_path=dotenv_path)
+
+# Coroutine counterparts of the zif_mongo_helper functions, with the same arguments and return values,
+# built on motor. An AsyncIOMotorClient belongs to the event loop it was created on, so one client is kept
+# per loop (and per process); it uses the pool and timeout settings of zif_mongo_helper.get_mongo_client.
+_async_mongo_clients = {}
+
+
+def get_async_mongo_client():
+    """
+    Returns the AsyncIOMotorClient of the running event loop, creating it on first use.
+    Must be called from a coroutine.
+    Raises:ImportError if motor is not installed, KeyError if MONGO_DB_URL is not set.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from zif_mongo_helper import get_mongo_client_options
+    loop = asyncio.get_running_loop()
+    key = (os.getpid(), id(loop))
+    entry = _async_mongo_clients.get(key)
+    if entry is None or entry[0] is not loop or loop.is_closed():
+        for stale_key in [stale_key for stale_key, (stale_loop, client) in _async_mongo_clients.items() if stale_loop.is_closed() or stale_key[0] != os.getpid()]:
+            del _async_mongo_clients[stale_key]
+        entry = _async_mongo_clients[key] = (loop, AsyncIOMotorClient(os.environ["MONGO_DB_URL"], **get_mongo_client_options()))
+    return entry[1]
+
+
+def close_async_mongo_client():
+    """
+    Closes the client of the running event loop, e.g. before the loop is shut down.
+    """
+    entry = _async_mongo_clients.pop((os.getpid(), id(asyncio.get_running_loop())), None)
+    if entry is not None:
+        entry[1].close()
+
+
+async def get_connection():
+    """
+    Async counterpart of zif_mongo_helper.get_connection.
+    Returns:motor.motor_asyncio.AsyncIOMotorDatabase or None: The ZIF_DB database, or None if an error occurs.
+    """
+    mongo_session = None
+    try:
+        mongo_session = get_async_mongo_client()[os.environ["ZIF_DB"]]
+    except Exception as exception:
+        print(exception)
+
+    return mongo_session
+
+
+async def get_collection(collection_name):
+    """
+    Async counterpart of zif_mongo_helper.get_collection.
+    Returns:motor.motor_asyncio.AsyncIOMotorCollection or None.
+    """
+    mongo_collection = None
+    try:
+        mongo_connection = await get_connection()
+        if mongo_connection is not None and collection_name:
+            mongo_collection = mongo_connection[collection_name]
+    except Exception as exception:
+        print(exception)
+
+    return mongo_collection
+
+
+async def get_single_document(query,collection_name='automation_airflow_config',projection=None):
+    """
+    Async counterpart of zif_mongo_helper.get_single_document.
+    Returns:dict or None: The first document that matches the query, or None if no match is found.
+    """
+    mongo_document = None
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query:
+            if projection is not None:
+                mongo_document = await mongo_collection.find_one(query, projection)
+            else:
+                mongo_document = await mongo_collection.find_one(query)
+    except Exception as exception:
+        print(exception)
+    return mongo_document
+
+
+async def get_all_documents(query,collection_name='remediate_alerts',projection=None):
+    """
+    Async counterpart of zif_mongo_helper.get_all_documents.
+    Returns:list or None: The documents that match the query, or None if no matches are found.
+    """
+    mongo_documents = None
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query:
+            if projection is not None:
+                mongo_documents = await mongo_collection.find(query, projection).to_list(length=None)
+            else:
+                mongo_documents = await mongo_collection.find(query).to_list(length=None)
+            if mongo_documents is None or len(mongo_documents) == 0:
+                mongo_documents = None
+    except Exception as exception:
+        print(exception)
+
+    return mongo_documents
+
+
+async def insert_single_document(collection_name, values):
+    """
+    Async counterpart of zif_mongo_helper.insert_single_document.
+    Returns:result (bool): True if the document was successfully inserted, otherwise False.
+    """
+    result = False
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and values:
+            mongo_document = await mongo_collection.insert_one(values)
+            result = mongo_document.inserted_id is not None
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def update_single_document(collection_name, query, new_values):
+    """
+    Async counterpart of zif_mongo_helper.update_single_document.
+    Returns:result (bool): True if the document was successfully updated, otherwise False.
+    """
+    result = False
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query and new_values:
+            mongo_document = await mongo_collection.update_one(query, {'$set': new_values})
+            result = mongo_document.modified_count > 0
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def update_all_documents(collection_name, query, new_values):
+    """
+    Async counterpart of zif_mongo_helper.update_all_documents.
+    Returns:result (bool): True if any documents were successfully updated, otherwise False.
+    """
+    result = False
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query and new_values:
+            mongo_document = await mongo_collection.update_many(query, {'$set': new_values})
+            result = mongo_document.modified_count > 0
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def upsert_single_document(query,new_values,collection_name='remediate_alerts'):
+    """
+    Async counterpart of zif_mongo_helper.upsert_single_document.
+    Returns:result (bool): True if an existing document was modified, otherwise False (as in the sync helper,
+    a newly inserted document reports False).
+    """
+    result = False
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query and new_values:
+            mongo_document = await mongo_collection.update_one(query, {'$set': new_values}, upsert=True)
+            result = mongo_document.modified_count > 0
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def upsert_all_documents(collection_name, query, new_values):
+    """
+    Async counterpart of zif_mongo_helper.upsert_all_documents.
+    Returns:result (bool): True if existing documents were modified, otherwise False.
+    """
+    result = False
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query and new_values:
+            mongo_document = await mongo_collection.update_many(query, {'$set': new_values}, upsert=True)
+            result = mongo_document.modified_count > 0
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def aggregate_query(collection_name, query, projection=None, unwind=None, child_object=None):
+    """
+    Async counterpart of zif_mongo_helper.aggregate_query: runs [$unwind,] query[, $project] as a pipeline.
+    Returns:list or None: The resulting documents, or None if an error occurs.
+    """
+    mongo_documents = None
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None and query:
+            pipeline = [query]
+            if unwind == True:
+                pipeline.insert(0, {"$unwind": child_object if projection is not None else str(child_object)})
+            if projection is not None:
+                pipeline.append({"$project": projection})
+            mongo_documents = await mongo_collection.aggregate(pipeline).to_list(length=None)
+    except Exception as exception:
+        print(exception)
+
+    return mongo_documents
+
+
+async def get_value_by_field_name(collection_name, primary_key_field_name, field_value, specific_field_name):
+    """
+    Async counterpart of zif_mongo_helper.get_value_by_field_name.
+    Returns:result (any or None): The value of the specific field if the document is found, otherwise None.
+    """
+    result = None
+    try:
+        mongo_collection = await get_collection(collection_name)
+        if mongo_collection is not None:
+            pipeline = [{"$match": {primary_key_field_name: field_value}}, {"$project": {"_id": 0, specific_field_name: f"${specific_field_name}"}}]
+            async for document in mongo_collection.aggregate(pipeline):
+                result = document[specific_field_name]
+    except Exception as exception:
+        print(exception)
+
+    return result
@@ -0,0 +1,178 @@
+from bson import ObjectId
+from zif_async_mongo_helper import get_connection, get_single_document
+from zif_workflow_helper import WORKFLOW_CONFIGURATION_COLLECTION, WORKFLOW_CONNECTION_COLLECTION, INCIDENT_CREATION_PARAMETERS, WORKFLOW_CONNECTION_MONITORING_COLLECTION, decrypt
+
+# Coroutine counterparts of the zif_workflow_helper lookups, with the same arguments and return values.
+
+
+async def get_mongodb_connection():
+    """
+    Async counterpart of zif_workflow_helper.get_mongodb_connection.
+    Returns:AsyncIOMotorDatabase or None.
+    """
+    return await get_connection()
+
+
+async def get_workflow_config_value(key):
+    """
+    Async counterpart of zif_workflow_helper.get_workflow_config_value. A fresh preloaded config cache answers
+    without I/O; otherwise the value is read from the workflow configuration collection.
+    Returns:str or None: The value associated with the provided key, or None if not found or an error occurs.
+    """
+    from config_cache_helper import CONFIG_CACHE_ENABLED, config_cache
+    result = None
+    try:
+        if key is not None:
+            cached, document = config_cache.get_cached_document({"key": key}) if CONFIG_CACHE_ENABLED else (False, None)
+            if not cached:
+                mongo_connection = await get_mongodb_connection()
+                document = await mongo_connection[WORKFLOW_CONFIGURATION_COLLECTION].find_one({"key": key}, {"value": 1}) if mongo_connection is not None else None
+            if document is not None:
+                result = document["value"]
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def get_connection_document(collection_name, connection_id):
+    mongo_connection = await get_mongodb_connection()
+    if mongo_connection is None or connection_id is None:
+        return None
+    return await mongo_connection[collection_name].find_one({"connId": connection_id}, {"connId": 0, "connType": 0})
+
+
+async def get_workflow_connection(connection_id):
+    """
+    Async counterpart of zif_workflow_helper.get_workflow_connection.
+    Returns:dict or None: host, username, password, port, extra (and database if set), or None.
+    """
+    result = None
+    try:
+        document = await get_connection_document(WORKFLOW_CONNECTION_COLLECTION, connection_id)
+        if document is not None:
+            user_name = decrypt(document["login"])
+            if user_name is None:
+                user_name = document["login"]
+            password = decrypt(document["password"])
+            if password is None:
+                password = document["password"]
+            result = {
+                "host": document["host"],
+                "username": user_name,
+                "password": password,
+                "port": document["port"],
+                "extra": document["extra"]
+            }
+            if "database" in document:
+                result["database"] = document["database"]
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def get_incident_creation_config(workflow_name):
+    """
+    Async counterpart of zif_workflow_helper.get_incident_creation_config.
+    """
+    result = None
+    try:
+        mongo_connection = await get_mongodb_connection()
+        if mongo_connection is not None and workflow_name is not None:
+            result = await mongo_connection[INCIDENT_CREATION_PARAMETERS].find_one({"workflowName": workflow_name}, {"_id": 0})
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def get_sccm_workflow_connection(connection_id):
+    """
+    Async counterpart of zif_workflow_helper.get_sccm_workflow_connection.
+    Returns:dict or None: host, username, password, port and extra, or None.
+    """
+    result = None
+    try:
+        document = await get_connection_document(WORKFLOW_CONNECTION_COLLECTION, connection_id)
+        if document is not None:
+            result = {
+                "host": document["host"],
+                "username": document["login"],
+                "password": document["password"],
+                "port": document["port"],
+                "extra": document["extra"]
+            }
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def get_workflow_monitoring_connection(connection_id):
+    """
+    Async counterpart of zif_workflow_helper.get_workflow_monitoring_connection.
+    Returns:dict or None: host, username, password, port, extra (and database if set), or None.
+    """
+    result = None
+    try:
+        document = await get_connection_document(WORKFLOW_CONNECTION_MONITORING_COLLECTION, connection_id)
+        if document is not None:
+            result = {
+                "host": document["host"],
+                "username": document["login"],
+                "password": document["password"],
+                "port": document["port"],
+                "extra": document["extra"]
+            }
+            if "database" in document and document["database"] is not None:
+                result["database"] = document["database"]
+    except Exception as exception:
+        print(exception)
+
+    return result
+
+
+async def get_va_configuration_document(title, os_version):
+    """
+    Async counterpart of zif_workflow_helper.get_va_configuration_document.
+    Returns:dict or None: The VA configuration document if found, otherwise None.
+    """
+    result = None
+    try:
+        search_filter = {"vaTitle": title, "osVersion": {"$regex": os_version, "$options": "i"}}
+        document = await get_single_document(search_filter, "automation_va_configuration")
+        if document is not None and len(document) > 0:
+            result = document
+    except Exception as exception:
+        print(exception)
+    return result
+
+
+async def get_va_transaction_document(objectId: str):
+    """
+    Async counterpart of zif_workflow_helper.get_va_transaction_document.
+    Returns:dict or None: The VA transaction document (without _id) if it is still 'New', otherwise None.
+    """
+    result = None
+    try:
+        search_filter = {"_id": ObjectId(objectId), 'status': 'New'}
+        document = await get_single_document(search_filter, "automation_va_transaction", {'_id': 0})
+        if document is not None and len(document) > 0:
+            result = document
+    except Exception as exception:
+        print(exception)
+    return result
+
+
+async def update_va_transaction_status(document_id: str, status: str, remarks: str, execution_date=None, rollback_params=None):
+    """
+    Async counterpart of zif_workflow_helper.update_va_transaction_status.
+    """
+    from zif_workflow_helper import get_va_transaction_update
+    from zif_async_mongo_helper import upsert_single_document
+    try:
+        query, new_values = get_va_transaction_update(document_id, status, remarks, execution_date, rollback_params)
+        await upsert_single_document(query, new_values, "automation_va_transaction")
+    except Exception as exception:
+        print(exception)
@@ -4,6 +4,8 @@ import sys
 import os
 from bson import ObjectId
 from datetime import datetime
+from zif_mongo_helper import get_connection
+from config_cache_helper import get_config_document
 
 
 WORKFLOW_CONFIGURATION_COLLECTION = "automation_airflow_config"
@@ -11,27 +13,21 @@ WORKFLOW_CONNECTION_COLLECTION = "automation_workflow_connection"
 INCIDENT_CREATION_PARAMETERS = "automation_incident_configuration"
 WORKFLOW_CONNECTION_MONITORING_COLLECTION = "automation_workflow_monitoring"
 
-mongo_client = pymongo.MongoClient(os.environ["MONGO_DB_URL"])
-mongo_session = mongo_client[os.environ["ZIF_DB"]]
-
 decrypt = lambda x: x
 
 def get_mongodb_connection():
     """
     Establishes a connection to a MongoDB database using environment variables for the connection details.
-    This function retrieves the MongoDB URL and database name from environment variables and 
-    creates a connection to the MongoDB database. If the connection is successful, it returns 
-    the MongoDB connection object; otherwise, it returns None.
+    This function retrieves the database name from environment variables and selects it on the
+    process-wide MongoClient shared with zif_mongo_helper (see get_mongo_client). If the connection is
+    successful, it returns the MongoDB connection object; otherwise, it returns None.
     Returns:MongoClient or None: A MongoDB client connection object if successful, None if an error occurs.
     Raises:
         Exception: If the connection attempt fails due to issues with environment variables or MongoDB.
     """
     result = None
     try:
-        data_source = os.environ["MONGO_DB_URL"]
-        database = os.environ["ZIF_DB"]
-        mongo_client = pymongo.MongoClient(data_source)
-        mongo_connection = mongo_client[database]
+        mongo_connection = get_connection()
         if mongo_connection is not None:
             result = mongo_connection
     except Exception as exception:
@@ -43,8 +39,9 @@ def get_mongodb_connection():
 def get_workflow_config_value(key):
     """
     Retrieves the configuration value for a given key from the workflow configuration collection.
-    This function queries the workflow configuration collection in MongoDB to fetch the value 
-    corresponding to the provided key. If the key exists in the collection, the value is returned.
+    The value is looked up in the in-process config cache (see config_cache_helper), which reads the
+    workflow configuration collection in MongoDB when it is empty or expired. If the key exists in the
+    collection, a copy of the value is returned.
     Args:key (str): The key whose corresponding configuration value needs to be retrieved.
     Returns:str or None: The value associated with the provided key, or None if not found or an error occurs.
     Raises:
@@ -52,10 +49,8 @@ def get_workflow_config_value(key):
     """
     result = None
     try:
-        mongo_connection = get_mongodb_connection()
-        if mongo_connection is not None and key is not None:
-            collection = mongo_connection[WORKFLOW_CONFIGURATION_COLLECTION]
-            document = collection.find_one({"key": key}, {"value": 1})
+        if key is not None:
+            document = get_config_document({"key": key})
             if document is not None:
                 result = document["value"]
     except Exception as exception:
@@ -140,7 +135,7 @@ def get_sccm_workflow_connection(connection_id):
     """
     result = None
     try:
-        mongo_connection = mongo_session
+        mongo_connection = get_mongodb_connection()
         if mongo_connection is not None and connection_id is not None:
             collection = mongo_connection[WORKFLOW_CONNECTION_COLLECTION]
             document = collection.find_one({"connId": connection_id}, {"connId": 0, "connType": 0})
@@ -261,25 +256,54 @@ def get_input_values_by_title(document_details: dict, title: str):
         print(exception)
 
 
-def update_va_transaction_status(document_id: str, status: str, remarks: str, execution_date=None, rollback_params=None):
+def get_va_transaction_update(document_id: str, status: str, remarks: str, execution_date=None, rollback_params=None):
     """
+    Builds the query and the new values of a VA transaction status update.
+    Returns:tuple: (query, new_values).
     """
     from datetime import datetime
     from bson.objectid import ObjectId
+    query = {"_id": ObjectId(document_id)}
+    current_date_time = datetime.now()
+    new_values = {'status': status, 'remarks': remarks, 'updatedDateTime': current_date_time}
+    if execution_date is not None:
+        new_values['workflowExecutionDateTime'] = execution_date
+    if rollback_params is not None:
+        new_values['rollbackParams'] = rollback_params
+    return query, new_values
+
+
+def update_va_transaction_status(document_id: str, status: str, remarks: str, execution_date=None, rollback_params=None):
+    """
+    """
     from zif_mongo_helper import upsert_single_document
     try:
-        query = {"_id": ObjectId(document_id)}
-        current_date_time = datetime.now()
-        new_values = {'status': status, 'remarks': remarks, 'updatedDateTime': current_date_time}
-        if execution_date is not None:
-            new_values['workflowExecutionDateTime'] = execution_date
-        if rollback_params is not None:
-            new_values['rollbackParams'] = rollback_params
-        upsert_single_document("automation_va_transaction", query, new_values)
+        query, new_values = get_va_transaction_update(document_id, status, remarks, execution_date, rollback_params)
+        upsert_single_document(query, new_values, "automation_va_transaction")
     except Exception as exception:
         print(exception)
 
 
+def update_va_transaction_statuses(updates: list):
+    """
+    Updates the status of many VA transactions with one bulk write instead of one upsert per document.
+    Args:updates (list): Dictionaries with the arguments of update_va_transaction_status: "document_id", "status",
+        "remarks" and optionally "execution_date" and "rollback_params".
+    Returns:list: One result dictionary per update (see zif_mongo_helper.BulkWriter), or None if an error occurs.
+    """
+    from zif_mongo_helper import bulk_write_documents
+    result = None
+    try:
+        operations = []
+        for update in updates:
+            query, new_values = get_va_transaction_update(**update)
+            operations.append({"operation": "upsert", "query": query, "values": new_values})
+        result = bulk_write_documents("automation_va_transaction", operations)
+    except Exception as exception:
+        print(exception)
+    return result
+
+
 def insert_va_reboot_document(values: dict):
     """
     Inserts a new VA reboot document into the 'automation_va_transaction' MongoDB collection.